@@ -0,0 +1,54 @@
+"""
+Bind and release /dev/rfcomm0 with RFCOMM ioctls, without forking sudo/rfcomm.
+
+Used by BluetoothModule (smartbin_flutter/lib/scripts/modules/rfcomm.py) and the
+desktop SmartBinPySerialProtocol (rfcomm.py at the repository root). The two
+copies must stay identical; tests/test_rfcomm.py checks this. The ioctls require
+CAP_NET_ADMIN; every function returns False when they are not available so
+callers can fall back to the sudo path.
+"""
+
+import fcntl
+import re
+import socket
+import struct
+
+# RFCOMM TTY ioctls from <bluetooth/rfcomm.h>: _IOW('R', 200/201, int)
+RFCOMMCREATEDEV = 0x400452C8
+RFCOMMRELEASEDEV = 0x400452C9
+RFCOMM_HANGUP_NOW = 2
+# struct rfcomm_dev_req { s16 dev_id; u32 flags; bdaddr_t src; bdaddr_t dst; u8 channel; }
+_RFCOMM_DEV_REQ = struct.Struct("@hI6s6sB3x")
+
+_MAC_RE = re.compile(r"[0-9A-Fa-f]{2}(?::[0-9A-Fa-f]{2}){5}")
+
+
+def rfcomm_ioctl(request: int, mac_address: str = None, flags: int = 0, channel: int = 0) -> bool:
+    """Issue an RFCOMM device ioctl for /dev/rfcomm0"""
+    if not hasattr(socket, "AF_BLUETOOTH"):
+        return False
+    if mac_address and not _MAC_RE.fullmatch(mac_address):
+        return False  # Let the sudo path report the bad address
+
+    # bdaddr_t is stored little-endian (reversed byte order)
+    dst = bytes(reversed(bytes.fromhex(mac_address.replace(":", "")))) if mac_address else bytes(6)
+    req = _RFCOMM_DEV_REQ.pack(0, flags, bytes(6), dst, channel)
+    try:
+        with socket.socket(socket.AF_BLUETOOTH, socket.SOCK_RAW, socket.BTPROTO_RFCOMM) as sock:
+            fcntl.ioctl(sock.fileno(), request, req)
+        return True
+    except OSError:
+        return False
+
+
+def release() -> bool:
+    """Release /dev/rfcomm0, hanging up any open connection"""
+    return rfcomm_ioctl(RFCOMMRELEASEDEV, flags=1 << RFCOMM_HANGUP_NOW)
+
+
+def bind(mac_address: str, channel: int = 1) -> bool:
+    """Rebind /dev/rfcomm0 to mac_address, releasing any existing binding first"""
+    release()
+    # No flags, like `rfcomm bind`: REUSE_DLC needs a connected socket (the
+    # kernel returns EBADFD otherwise) and the binding should outlive a hangup
+    return rfcomm_ioctl(RFCOMMCREATEDEV, mac_address, channel=channel)
@@ -34,25 +34,28 @@ class SmartBinEngine:
         if command == 'stop':
             SmartBinEngine.stop()
 
-        # Split the command
-        command_parts = split_command(command)
+        # Split off the main command; the rest is parsed per module
+        command_parts = command.split(None, 1)
 
         if not command_parts:
             print("Error: Empty command")
             return
-        elif len(command_parts) == 1:
-            remaining_args = []
-        else:
-            remaining_args = command_parts[1:]
 
         # Get the main command (first part)
         main_command = command_parts[0]
+        rest = command_parts[1] if len(command_parts) > 1 else ""
 
         # Dispatch to appropriate module
         if main_command in ['classify', "classification"]:
-            ClassificationModule.handle_command(remaining_args)
+            # Subcommand or image path, passed through verbatim
+            ClassificationModule.handle_command([rest] if rest else [])
         elif main_command == 'bluetooth':
-            BluetoothModule.handle_command(remaining_args)
+            subcommand, _, payload = rest.partition(' ')
+            if subcommand == 'send':
+                # Message is forwarded as-is rather than split and re-joined
+                BluetoothModule.handle_command([subcommand, payload.lstrip()] if payload.strip() else [subcommand])
+            else:
+                BluetoothModule.handle_command(split_command(rest))
         else:
             print("Error: Unknown command")
 
@@ -120,9 +123,17 @@ class SmartBinEngine:
 
     @staticmethod
     def main_loop():
+        """Serve commands from stdin for the lifetime of the Flutter app.
+
+        This process is the warm worker: modules and the loaded model persist
+        across commands, so only `classify init` pays the model load cost.
+        """
         # Check if the script is called with "start" argument
+        if len(sys.argv) == 2 and sys.argv[1] == "--stream":
+            ClassificationModule.stream(sys.stdin, sys.stdout)
+            return
         if len(sys.argv) != 2 or sys.argv[1] != "start":
-            print("Usage: python script.py start")
+            print("Usage: python script.py start | --stream")
             sys.exit(1)
 
         print("ready")
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Build a TensorRT FP16 engine for the classifier on this machine's GPU.
+
+Run once per machine (engines are tied to the GPU and TensorRT version they
+were built with); the export takes minutes, so it is kept out of
+`classify init`. ClassificationModule.init() picks up classifier_model_yolo.engine
+automatically when it sits next to the .pt weights and CUDA is available.
+
+Usage: python export_engine.py [--weights classifier_model_yolo.pt]
+"""
+
+import argparse
+from pathlib import Path
+
+from ultralytics import YOLO
+
+IMG_SIZE = 224
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the YOLO classifier to a TensorRT FP16 engine")
+    parser.add_argument('--weights', default='classifier_model_yolo.pt', help='Trained .pt weights')
+    args = parser.parse_args()
+
+    engine_path = Path(YOLO(args.weights).export(format='engine', half=True, imgsz=IMG_SIZE, dynamic=False))
+    print(f"TensorRT engine written to {engine_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Export the classifier to an INT8-quantized ONNX model for on-device inference.
+
+Run once at packaging time. ClassificationModule.init() picks up
+classifier_model_yolo.int8.onnx automatically when it sits next to the .pt weights,
+and smartbin_gui.py does the same for runs/smartbin_9class/weights/best.int8.onnx.
+
+Usage: python export_int8.py --calib path/to/sample/images
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+from ultralytics import YOLO
+
+IMG_SIZE = 224
+
+
+def preprocess(image_path: Path) -> np.ndarray:
+    """Resize + center-crop to IMG_SIZE and return a 1x3xHxW float32 tensor in [0, 1]"""
+    img = Image.open(image_path).convert('RGB')
+    scale = IMG_SIZE / min(img.size)
+    img = img.resize((round(img.width * scale), round(img.height * scale)), Image.BILINEAR)
+    left = (img.width - IMG_SIZE) // 2
+    top = (img.height - IMG_SIZE) // 2
+    img = img.crop((left, top, left + IMG_SIZE, top + IMG_SIZE))
+    return (np.asarray(img, dtype=np.float32) / 255.0).transpose(2, 0, 1)[None]
+
+
+class ImageFolderReader(CalibrationDataReader):
+    """Feeds calibration images from a folder (searched recursively) to the quantizer"""
+
+    def __init__(self, folder: Path, input_name: str, limit: int):
+        paths = sorted(p for p in folder.rglob('*') if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))[:limit]
+        if not paths:
+            raise ValueError(f"No calibration images found in {folder}")
+        self._inputs = iter({input_name: preprocess(p)} for p in paths)
+
+    def get_next(self):
+        return next(self._inputs, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the YOLO classifier to INT8 ONNX")
+    parser.add_argument('--weights', default='classifier_model_yolo.pt', help='Trained .pt weights')
+    parser.add_argument('--calib', required=True, help='Folder of representative images for calibration')
+    parser.add_argument('--samples', type=int, default=200, help='Max calibration images to use')
+    args = parser.parse_args()
+
+    weights = Path(args.weights)
+    fp32_path = Path(YOLO(str(weights)).export(format='onnx', imgsz=IMG_SIZE))
+    int8_path = weights.with_suffix('.int8.onnx')
+
+    quantize_static(
+        str(fp32_path),
+        str(int8_path),
+        ImageFolderReader(Path(args.calib), 'images', args.samples),
+        quant_format=QuantFormat.QDQ,
+        weight_type=QuantType.QInt8,
+        activation_type=QuantType.QUInt8,
+    )
+    print(f"INT8 model written to {int8_path}")
+
+
+if __name__ == '__main__':
+    main()
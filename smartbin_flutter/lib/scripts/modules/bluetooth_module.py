@@ -1,14 +1,25 @@
 #!/usr/bin/env python3
-from datetime import datetime, timedelta
+from collections import deque
+import logging
 import os
+import re
 import subprocess
 import threading
 import time
-import base64
-from typing import Tuple
+import binascii
+from concurrent.futures import ThreadPoolExecutor
+
+from . import rfcomm
 
 serial = None  # Will be replaced with import during init
 
+# Reader-thread diagnostics go through logging (stderr) so stdout stays
+# reserved for command responses parsed by the Flutter engine.
+log = logging.getLogger(__name__)
+
+# PA000 metadata, e.g. "type:image, size:12345, format:JPEG, parts:5"
+_META_RE = re.compile(r'\s*([^:,\s]+)\s*:\s*([^,]*?)\s*(?:,|$)')
+
 
 class BluetoothModule:
     """Bluetooth communication module with static methods and fields"""
@@ -19,20 +30,35 @@ class BluetoothModule:
     is_running = False
     is_connected = False
     _rfcomm_bound = False
-    _reader_thread = None
-    _buffer = []
+    _executor = None  # single long-lived reader worker, reused across reconnects
+    _reader_future = None
+    _stop_event = threading.Event()  # Set to stop the reader; wakes waiters immediately
+    _rx = bytearray()  # Bytes received but not yet terminated by a newline
+    # Bounded so a stalled consumer (e.g. paused UI) can't grow memory forever;
+    # once full, the oldest lines are dropped and counted in _buffer_dropped,
+    # which get_buffer() reports and resets.
+    _buffer_capacity = 4096
+    _buffer = deque(maxlen=_buffer_capacity)
+    _buffer_dropped = 0
+    _buffer_lock = threading.Lock()  # Reader thread appends while commands drain
     _sudo_password = None
     _stored_mac = "EC:E3:34:15:F2:62"
 
     # Configuration
     _rfcomm_device = "/dev/rfcomm0"
     _baudrate = 115200
+    _image_path = "./smartbin_capture.jpg"
+    _image_tmp_path = _image_path + ".part"  # Replaces _image_path only once complete
 
     # Image processing state
     _waiting_for_image = False
     _image_metadata = {}
-    _image_parts = {}
     _expected_parts = 0
+    _next_part = 1
+    _image_fd = None
+    _image_pending = bytearray()  # decoded bytes not yet written to _image_fd
+    _image_flush_size = 64 * 1024
+    _b64_remainder = b""  # base64 chars not yet forming a full 4-char group
 
     @staticmethod
     def handle_command(args: list):
@@ -93,7 +119,7 @@ class BluetoothModule:
             if len(args) < 2:
                 print("Error: No message provided")
                 return
-            message = ' '.join(args[1:])  # Join remaining args as message
+            message = args[1]  # Full message, unsplit by the engine
             success = "Successful" if BluetoothModule.transmit_message(message) else "Error sending message"
 
         elif len(args) >= 2 and args[0] == 'get' and args[1] == 'buffer':
@@ -113,7 +139,7 @@ class BluetoothModule:
 
         try:
             # Add to buffer for logging
-            BluetoothModule._buffer.append(f"SENT: {message}")
+            BluetoothModule._buffer_append(f"SENT: {message}")
 
             # Send the message
             try:
@@ -121,9 +147,7 @@ class BluetoothModule:
                     # print("Error: Serial not open")
                     return False
 
-                msg = f"{code} {message}".strip()
-                BluetoothModule._ser.write((msg + "\n").encode("utf-8"))
-                BluetoothModule._ser.flush()
+                BluetoothModule._ser.write(_encode_message(code, message))
                 # print(f"📤 Sent: {msg}")
                 return True
 
@@ -135,17 +159,59 @@ class BluetoothModule:
             print(f"Error transmitting message: {e}")
             return False
 
+    @staticmethod
+    def _send_bluetooth_message(code: str, content: str = "") -> bool:
+        """Send a protocol message to the ESP32 (not recorded in the buffer)"""
+        return BluetoothModule._write_raw(_encode_message(code, content))
+
+    @staticmethod
+    def _write_raw(payload: bytes, drain: bool = False) -> bool:
+        """Write an already-encoded protocol line to the serial port.
+
+        Writes are left to the tty driver's buffering; pass drain=True to block
+        until the bytes are on the wire (only where reply timing matters).
+        """
+        ser = BluetoothModule._ser
+        if not ser or not ser.is_open:
+            return False
+        try:
+            ser.write(payload)
+            if drain:
+                ser.flush()
+            return True
+        except Exception as e:
+            log.warning("Serial write failed: %s", e)
+            return False
+
+    @staticmethod
+    def _buffer_append(line: str):
+        """Append a line to the buffer, counting lines evicted when it is full"""
+        with BluetoothModule._buffer_lock:
+            if len(BluetoothModule._buffer) == BluetoothModule._buffer_capacity:
+                BluetoothModule._buffer_dropped += 1
+            BluetoothModule._buffer.append(line)
+
     @staticmethod
     def get_buffer() -> list:
-        """Get and clear the bluetooth buffer"""
-        buffer_copy = BluetoothModule._buffer.copy()
-        BluetoothModule._buffer.clear()
+        """Get and clear the bluetooth buffer.
+
+        If lines were evicted since the last call, a `DROPPED: <n>` status line
+        leads the result so the consumer sees the backpressure; the count resets.
+        """
+        with BluetoothModule._buffer_lock:
+            buffer_copy = list(BluetoothModule._buffer)
+            BluetoothModule._buffer.clear()
+            dropped = BluetoothModule._buffer_dropped
+            BluetoothModule._buffer_dropped = 0
+        if dropped:
+            buffer_copy.insert(0, f"DROPPED: {dropped}")
         return buffer_copy
 
     @staticmethod
     def read_buffer() -> list:
         """Read the bluetooth buffer without clearing it"""
-        return BluetoothModule._buffer.copy()
+        with BluetoothModule._buffer_lock:
+            return list(BluetoothModule._buffer)
 
     @staticmethod
     def is_initialized() -> bool:
@@ -168,6 +234,9 @@ class BluetoothModule:
             # Store sudo password for later use
             BluetoothModule._sudo_password = sudo_password
 
+            if BluetoothModule._executor is None:
+                BluetoothModule._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bt-reader')
+
             BluetoothModule._initialized = True
             # print("Success")
             return True
@@ -215,14 +284,9 @@ class BluetoothModule:
             BluetoothModule.is_connected = True
 
             # Attempt to wait 10s for reader thread to crash to verify that connection is fully established
-            timestamp = datetime.now()
-            wait_duration = timedelta(seconds=10)
-            while datetime.now() - timestamp < wait_duration:
-                if not BluetoothModule.is_connected:
-                    # print("Error: I/O failed. Device may be offline")
-                    return False
-                time.sleep(0.001)
-
+            if BluetoothModule._stop_event.wait(10) or not BluetoothModule.is_connected:
+                # print("Error: I/O failed. Device may be offline")
+                return False
 
             print("Successfully connected")
 
@@ -258,24 +322,39 @@ class BluetoothModule:
             """Close serial connection"""
             if BluetoothModule._ser and BluetoothModule._ser.is_open:
                 try:
+                    # Writes are not flushed individually, so drain them before closing
+                    BluetoothModule._ser.flush()
+                except Exception as e:
+                    log.warning("Serial flush failed: %s", e)
+                try:
+                    # Wake the reader out of its blocking read before closing the port
+                    if hasattr(BluetoothModule._ser, "cancel_read"):
+                        BluetoothModule._ser.cancel_read()
                     BluetoothModule._ser.close()
                     # print("✅ Serial connection closed")
                 except Exception as e:
                     print(f"⚠️ Serial close warning: {e}")
 
+        # Stop the reader first so the cancelled read isn't reported as an error
+        BluetoothModule.is_running = False
+        BluetoothModule._stop_event.set()
+
         # Close serial connection
         _cleanup_serial()
 
         # Release RFCOMM binding
         BluetoothModule._cleanup_rfcomm_binding(BluetoothModule._sudo_password)
 
-        BluetoothModule.is_running = False
         BluetoothModule.is_connected = False
 
-        # Wait for reader thread to finish
-        if BluetoothModule._reader_thread and BluetoothModule._reader_thread.is_alive():
-            BluetoothModule._reader_thread.join(timeout=5)
-            print("✅ Reader thread stopped")
+        # Wait for the reader loop to finish
+        future = BluetoothModule._reader_future
+        if future and not future.done():
+            try:
+                future.result(timeout=5)
+                print("✅ Reader thread stopped")
+            except Exception as e:
+                log.warning("Reader did not stop cleanly: %s", e)
 
     @staticmethod
     def stop():
@@ -286,6 +365,9 @@ class BluetoothModule:
                 BluetoothModule.disconnect()
 
             # Clean up module
+            if BluetoothModule._executor is not None:
+                BluetoothModule._executor.shutdown(wait=True)
+                BluetoothModule._executor = None
             BluetoothModule._initialized = False
             BluetoothModule._sudo_password = None
             print("✅ Bluetooth module stopped")
@@ -296,46 +378,34 @@ class BluetoothModule:
         BluetoothModule._cleanup_connection()
         BluetoothModule._initialized = False
 
+    @staticmethod
+    def _run_sudo(args: list, sudo_password: str = None, timeout: float = 5) -> subprocess.CompletedProcess:
+        """Run a command under sudo, feeding the password on stdin when one is given"""
+        if sudo_password:
+            return subprocess.run(["sudo", "-S", *args], input=(sudo_password + "\n").encode(),
+                                  capture_output=True, timeout=timeout)
+        return subprocess.run(["sudo", *args], capture_output=True, timeout=timeout)
+
     @staticmethod
     def _setup_rfcomm_binding(mac_address: str, sudo_password: str = None) -> bool:
         """Setup RFCOMM binding to specified MAC address"""
+        # Fast path: bind via ioctl when the process has CAP_NET_ADMIN
+        if rfcomm.bind(mac_address):
+            BluetoothModule._rfcomm_bound = True
+            return True
+
         try:
             # First try to release any existing binding
             try:
-                if sudo_password:
-                    release_cmd = subprocess.Popen(
-                        ["sudo", "-S", "rfcomm", "release", "0"],
-                        stdin=subprocess.PIPE,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        text=True
-                    )
-                    release_cmd.communicate(input=sudo_password + "\n", timeout=5)
-                else:
-                    subprocess.run(["sudo", "rfcomm", "release", "0"], capture_output=True, text=True, timeout=5)
+                BluetoothModule._run_sudo(["rfcomm", "release", "0"], sudo_password, timeout=5)
             except Exception:
                 pass
 
             # Bind to the specified MAC address
-            if sudo_password:
-                bind_cmd = subprocess.Popen(
-                    ["sudo", "-S", "rfcomm", "bind", "0", mac_address, "1"],
-                    stdin=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                stdout, stderr = bind_cmd.communicate(input=sudo_password + "\n", timeout=10)
-
-                if bind_cmd.returncode != 0:
-                    print(f"Error: Failed to bind RFCOMM: {stderr}")
-                    return False
-            else:
-                res = subprocess.run(["sudo", "rfcomm", "bind", "0", mac_address, "1"],
-                                   capture_output=True, text=True, timeout=10)
-                if res.returncode != 0:
-                    print(f"Error: Failed to bind RFCOMM: {res.stderr}")
-                    return False
+            res = BluetoothModule._run_sudo(["rfcomm", "bind", "0", mac_address, "1"], sudo_password, timeout=10)
+            if res.returncode != 0:
+                print(f"Error: Failed to bind RFCOMM: {res.stderr.decode(errors='replace')}")
+                return False
 
             BluetoothModule._rfcomm_bound = True
             # print(f"Info: RFCOMM bound to {BluetoothModule._rfcomm_device}")
@@ -350,18 +420,11 @@ class BluetoothModule:
     def _cleanup_rfcomm_binding(sudo_password: str = None):
         """Release RFCOMM binding"""
         if BluetoothModule._rfcomm_bound:
+            if rfcomm.release():
+                BluetoothModule._rfcomm_bound = False
+                return
             try:
-                if sudo_password:
-                    release_cmd = subprocess.Popen(
-                        ["sudo", "-S", "rfcomm", "release", "0"],
-                        stdin=subprocess.PIPE,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        text=True
-                    )
-                    release_cmd.communicate(input=sudo_password + "\n", timeout=5)
-                else:
-                    subprocess.run(["sudo", "rfcomm", "release", "0"], capture_output=True, text=True, timeout=5)
+                BluetoothModule._run_sudo(["rfcomm", "release", "0"], sudo_password, timeout=5)
                 # print("RFCOMM released")
             except Exception as e:
                 # print(f"⚠️ RFCOMM release warning: {e}")
@@ -375,7 +438,7 @@ class BluetoothModule:
             BluetoothModule._ser = serial.Serial(
                 port=BluetoothModule._rfcomm_device,
                 baudrate=BluetoothModule._baudrate,
-                timeout=1,
+                timeout=None,  # Blocking reads; the reader wakes as soon as data arrives
                 write_timeout=1,
                 bytesize=serial.EIGHTBITS,
                 parity=serial.PARITY_NONE,
@@ -393,25 +456,56 @@ class BluetoothModule:
 
     @staticmethod
     def _start_reader_thread():
-        """Start the bluetooth reader thread"""
-        BluetoothModule._reader_thread = threading.Thread(target=BluetoothModule._bluetooth_reader_loop, daemon=True)
-        BluetoothModule._reader_thread.start()
+        """Start the bluetooth reader loop on the reader worker"""
+        BluetoothModule._stop_event.clear()
+        BluetoothModule._reader_future = BluetoothModule._executor.submit(BluetoothModule._bluetooth_reader_loop)
         # print("📖 Bluetooth reader thread started")
 
+    @staticmethod
+    def _tune_reader_thread(thread: threading.Thread):
+        """Pin the reader thread to one CPU and give it low real-time priority (Linux only)"""
+        if not hasattr(os, "sched_setaffinity") or thread.native_id is None:
+            return
+
+        try:
+            cpus = os.sched_getaffinity(0)
+            if len(cpus) > 1:
+                # Keep the reader on a warm core, away from CPU 0 where most IRQs land
+                os.sched_setaffinity(thread.native_id, {max(cpus)})
+        except OSError as e:
+            log.debug("Reader CPU pinning skipped: %s", e)
+
+        try:
+            # Requires CAP_SYS_NICE; without it the thread keeps the default policy
+            os.sched_setscheduler(thread.native_id, os.SCHED_FIFO, os.sched_param(1))
+        except (OSError, AttributeError) as e:
+            log.debug("Reader SCHED_FIFO skipped: %s", e)
+
     @staticmethod
     def _bluetooth_reader_loop():
         """Main bluetooth reader loop - runs in separate thread"""
         # print("Bluetooth reader active")
-        while BluetoothModule.is_running and BluetoothModule._ser and BluetoothModule._ser.is_open:
+        BluetoothModule._tune_reader_thread(threading.current_thread())
+        rx = BluetoothModule._rx
+        rx.clear()
+        while not BluetoothModule._stop_event.is_set() and BluetoothModule._ser and BluetoothModule._ser.is_open:
             try:
-                if BluetoothModule._ser.in_waiting > 0:
-                    line = BluetoothModule._ser.readline().decode('utf-8', errors='ignore').strip()
+                # Blocks until at least one byte arrives, then takes everything already queued
+                data = BluetoothModule._ser.read(max(1, BluetoothModule._ser.in_waiting))
+                if not data:
+                    continue  # Read was cancelled by _cleanup_connection
+                rx += data
+
+                # Split complete lines off the front in place; only finished lines are decoded
+                end = rx.find(b"\n")
+                while end >= 0:
+                    line = rx[:end].decode('utf-8', errors='ignore').strip()
+                    del rx[:end + 1]
                     if line:
                         BluetoothModule._process_bluetooth_line(line)
-                else:
-                    time.sleep(0.01)  # Small delay to prevent busy waiting
+                    end = rx.find(b"\n")
             except Exception as e:
-                if BluetoothModule.is_running:
+                if not BluetoothModule._stop_event.is_set():
                     print(f"Error: <disconnect> {e}")
                 break
         # print("Bluetooth reader stopped. Disconnecting bluetooth...")
@@ -421,127 +515,236 @@ class BluetoothModule:
     @staticmethod
     def _process_bluetooth_line(line: str):
         """Process a line received from bluetooth"""
-        if BluetoothModule._is_protocol_message(line):
-            code, content = BluetoothModule._extract_code_content(line)
-            BluetoothModule._handle_protocol_message(code, content)
-        else:
-            # Regular message - add to buffer for external consumption
-            BluetoothModule._buffer.append(line)
-            # print(f"ESP32: {line}")
+        # Protocol lines are "CODE# content": slice the code once and reuse it
+        if len(line) >= 6 and line[5] == ' ':
+            code = line[:5]
+            if BluetoothModule._is_protocol_code(code):
+                BluetoothModule._handle_protocol_message(code, line[6:])
+                return
 
-    @staticmethod
-    def _is_protocol_message(line: str) -> bool:
-        """Check if line is a protocol message"""
-        if len(line) < 6:
-            return False
-        code = line[:5]
-        if line[5] != ' ':
-            return False
-        return (code in ['RTC00', 'RTC01', 'RTC02', 'CLS01'] or
-                code.startswith('PA') or code.startswith('PX') or
-                code.startswith('ERR'))
+        # Regular message - add to buffer for external consumption
+        BluetoothModule._buffer_append(line)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("ESP32: %s", line)
 
     @staticmethod
-    def _extract_code_content(line: str) -> Tuple[str, str]:
-        """Extract protocol code and content from line"""
-        code = line[:5]
-        content = line[6:] if len(line) > 6 else ""
-        return code, content
+    def _is_protocol_code(code: str) -> bool:
+        """Check if a 5-char code is a protocol code"""
+        return code in _EXACT_CODES or code.startswith(_PROTOCOL_PREFIXES)
 
     @staticmethod
     def _handle_protocol_message(code: str, content: str):
         """Handle protocol messages internally"""
-        print(f"📥 Protocol: {code} {content}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Protocol %s %s", code, content)
 
-        if code == 'RTC00':
-            print("🤝 ESP32 requesting connection")
-            BluetoothModule.transmit_message('RTC01', 'Laptop ready')
+        handler = _CODE_HANDLERS.get(code) or _PREFIX_HANDLERS.get(code[:2])
+        if handler:
+            handler(code, content)
 
-        elif code == 'RTC02':
-            print("🎉 Connection established")
-            BluetoothModule.is_connected = True
+    @staticmethod
+    def _on_connection_request(code: str, content: str):
+        """RTC00: ESP32 requesting connection"""
+        log.debug("ESP32 requesting connection")
+        BluetoothModule._write_raw(_ACK_RTC01, drain=True)
 
-        elif code == 'PA000':
-            BluetoothModule._handle_image_metadata(content)
+    @staticmethod
+    def _on_connection_established(code: str, content: str):
+        """RTC02: connection confirmed by ESP32"""
+        log.debug("Connection established")
+        BluetoothModule.is_connected = True
 
-        elif code.startswith('PA'):
+    @staticmethod
+    def _on_image_part(code: str, content: str):
+        """PA000 carries image metadata; PA### carries an image part"""
+        if code == 'PA000':
+            BluetoothModule._handle_image_metadata(content)
+        else:
             BluetoothModule._handle_image_part(int(code[2:]), content)
 
-        elif code.startswith('PX'):
-            BluetoothModule._handle_final_image_part(int(code[2:]), content)
-
-        elif code.startswith('ERR'):
-            print(f"⚠️ ESP32 Error: {content}")
-            # Add error to buffer so Flutter app can see it
-            BluetoothModule._buffer.append(f"ERROR: {content}")
+    @staticmethod
+    def _on_final_image_part(code: str, content: str):
+        """PX###: last image part"""
+        BluetoothModule._handle_final_image_part(int(code[2:]), content)
 
+    @staticmethod
+    def _on_error(code: str, content: str):
+        """ERR##: error reported by ESP32"""
+        log.warning("ESP32 error: %s", content)
+        # Add error to buffer so Flutter app can see it
+        BluetoothModule._buffer_append(f"ERROR: {content}")
 
     @staticmethod
     def _handle_image_metadata(content: str):
         """Handle image metadata from ESP32"""
-        print(f"📷 Image metadata: {content}")
-        BluetoothModule._image_metadata = {}
-        BluetoothModule._image_parts = {}
-
-        for item in content.split(','):
-            item = item.strip()
-            if ':' in item:
-                k, v = item.split(':', 1)
-                BluetoothModule._image_metadata[k.strip()] = v.strip()
-
+        log.debug("Image metadata: %s", content)
+        BluetoothModule._reset_image_state()
+        BluetoothModule._image_metadata = dict(_META_RE.findall(content))
         BluetoothModule._expected_parts = int(BluetoothModule._image_metadata.get('parts', '0'))
+
+        # Parts are decoded and written as they arrive, so only one chunk is held in RAM.
+        # They go to a temp file so a failed transfer never clobbers the last good capture.
+        try:
+            BluetoothModule._image_fd = os.open(BluetoothModule._image_tmp_path,
+                                                os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        except OSError as e:
+            log.error("Cannot open image file: %s", e)
+            BluetoothModule._send_bluetooth_message('ERR04', 'image_processing_failed')
+            BluetoothModule._reset_image_state()
+            return
         BluetoothModule._waiting_for_image = True
-        print(f"📊 Expecting {BluetoothModule._expected_parts} image parts")
+        log.debug("Expecting %d image parts", BluetoothModule._expected_parts)
+
+        # Warm the classifier while the image parts are still arriving
+        from .classification_module import ClassificationModule
+        if ClassificationModule.is_initialized:
+            threading.Thread(target=ClassificationModule.prewarm, daemon=True).start()
 
     @staticmethod
     def _handle_image_part(part_num: int, content: str):
         """Handle image part from ESP32"""
         if not BluetoothModule._waiting_for_image:
-            print("⚠️ Image part received unexpectedly")
+            log.warning("Image part received unexpectedly")
             return
 
-        BluetoothModule._image_parts[part_num] = content
-        print(f"📦 Received image part {part_num}/{BluetoothModule._expected_parts}")
+        if not BluetoothModule._write_image_part(part_num, content):
+            return
+        # Only report every 16th part so progress logging stays off the per-chunk path
+        if part_num % 16 == 0 and log.isEnabledFor(logging.DEBUG):
+            log.debug("Received image part %d/%d", part_num, BluetoothModule._expected_parts)
 
     @staticmethod
     def _handle_final_image_part(part_num: int, content: str):
         """Handle final image part from ESP32"""
         if not BluetoothModule._waiting_for_image:
-            print("⚠️ Final image part received unexpectedly")
+            log.warning("Final image part received unexpectedly")
             return
 
-        BluetoothModule._image_parts[part_num] = content
-        print(f"🏁 Final image part {part_num}/{BluetoothModule._expected_parts}")
+        if not BluetoothModule._write_image_part(part_num, content):
+            return
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Final image part %d/%d", part_num, BluetoothModule._expected_parts)
         BluetoothModule._process_complete_image()
 
+    @staticmethod
+    def _write_image_part(part_num: int, content: str) -> bool:
+        """Decode a base64 image part and append it to the image file.
+
+        Parts must arrive in order. They need not be 4-char aligned, so any
+        trailing remainder is carried into the next part.
+        """
+        if part_num != BluetoothModule._next_part:
+            # A gap can never be filled in a stream, so abandon the image now
+            log.warning("Image part %d out of sequence (expected %d)", part_num, BluetoothModule._next_part)
+            BluetoothModule._send_bluetooth_message('ERR02', 'missing_image_parts')
+            BluetoothModule._reset_image_state()
+            return False
+
+        try:
+            data = BluetoothModule._b64_remainder + content.encode('ascii')
+            cut = len(data) - len(data) % 4
+            BluetoothModule._image_pending += binascii.a2b_base64(memoryview(data)[:cut])
+            BluetoothModule._b64_remainder = data[cut:]
+            BluetoothModule._next_part += 1
+            if len(BluetoothModule._image_pending) >= BluetoothModule._image_flush_size:
+                BluetoothModule._flush_image_data()
+            return True
+        except (ValueError, OSError) as e:
+            # Non-ASCII or malformed base64 (both ValueError), or a failed disk write
+            log.error("Image part %d rejected: %s", part_num, e)
+            BluetoothModule._send_bluetooth_message('ERR04', 'image_processing_failed')
+            BluetoothModule._reset_image_state()
+            return False
+
+    @staticmethod
+    def _flush_image_data():
+        """Write pending decoded bytes straight to the image fd, bypassing buffered I/O"""
+        pending = BluetoothModule._image_pending
+        with memoryview(pending) as mv:
+            total = 0
+            while total < len(mv):
+                total += os.write(BluetoothModule._image_fd, mv[total:])
+        pending.clear()
+
+    @staticmethod
+    def _close_image_file():
+        """Close the image file if one is open"""
+        if BluetoothModule._image_fd is not None:
+            try:
+                os.close(BluetoothModule._image_fd)
+            finally:
+                BluetoothModule._image_fd = None
+
     @staticmethod
     def _process_complete_image():
         """Process complete image received from ESP32"""
         try:
-            print("🔄 Processing complete image...")
-            base64_data = "".join(BluetoothModule._image_parts.get(i, "") for i in range(1, BluetoothModule._expected_parts + 1))
-            image_data = base64.b64decode(base64_data)
-
-            # Save image temporarily and add to buffer for Flutter app
-            # timestamp = int(time.time())
-            image_path = f"./smartbin_capture.jpg"
+            if BluetoothModule._next_part - 1 != BluetoothModule._expected_parts:
+                log.warning("Image ended after %d of %d parts",
+                            BluetoothModule._next_part - 1, BluetoothModule._expected_parts)
+                BluetoothModule._send_bluetooth_message('ERR02', 'missing_image_parts')
+                return
 
-            with open(image_path, 'wb') as f:
-                f.write(image_data)
+            tail = BluetoothModule._b64_remainder
+            if tail:
+                BluetoothModule._image_pending += binascii.a2b_base64(tail + b"=" * (-len(tail) % 4))
+            BluetoothModule._flush_image_data()
+            BluetoothModule._close_image_file()
 
-            print(f"🖼️ Image saved: {image_path}")
+            image_path = BluetoothModule._image_path
+            os.replace(BluetoothModule._image_tmp_path, image_path)
+            log.debug("Image saved: %s", image_path)
 
             # Add image notification to buffer
-            BluetoothModule._buffer.append(f"IMAGE_RECEIVED: {image_path}")
+            BluetoothModule._buffer_append(f"IMAGE_RECEIVED: {image_path}")
 
         except Exception as e:
-            print(f"❌ Image processing error: {e}")
+            log.error("Image processing error: %s", e)
             BluetoothModule._send_bluetooth_message('ERR04', 'image_processing_failed')
 
         finally:
-            # Reset image state
-            BluetoothModule._waiting_for_image = False
-            BluetoothModule._image_metadata = {}
-            BluetoothModule._image_parts = {}
-            BluetoothModule._expected_parts = 0
+            BluetoothModule._reset_image_state()
 
+    @staticmethod
+    def _reset_image_state():
+        """Close and discard any partial image file and clear image state"""
+        BluetoothModule._close_image_file()
+        try:
+            os.unlink(BluetoothModule._image_tmp_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log.warning("Could not remove partial image: %s", e)
+        BluetoothModule._image_pending.clear()
+        BluetoothModule._waiting_for_image = False
+        BluetoothModule._image_metadata = {}
+        BluetoothModule._b64_remainder = b""
+        BluetoothModule._next_part = 1
+        BluetoothModule._expected_parts = 0
+
+
+def _encode_message(code: str, content: str) -> bytes:
+    """Encode `CODE content` (or just `content` when there is no code) as one line"""
+    if not code:
+        return content.encode("utf-8") + b"\n"
+    if not content:
+        return code.encode("ascii") + b"\n"
+    return b"%s %s\n" % (code.encode("ascii"), content.encode("utf-8"))
+
+
+# Fixed control messages, precomposed so replies skip formatting entirely
+_ACK_RTC01 = b"RTC01 Laptop ready\n"
+
+# Protocol dispatch tables: exact 5-char codes first, then 2-char code families.
+# RTC01 and CLS01 are valid protocol codes that need no handling on this side.
+_EXACT_CODES = frozenset(('RTC00', 'RTC01', 'RTC02', 'CLS01'))
+_PROTOCOL_PREFIXES = ('PA', 'PX', 'ERR')
+_CODE_HANDLERS = {
+    'RTC00': BluetoothModule._on_connection_request,
+    'RTC02': BluetoothModule._on_connection_established,
+}
+_PREFIX_HANDLERS = {
+    'PA': BluetoothModule._on_image_part,
+    'PX': BluetoothModule._on_final_image_part,
+    'ER': BluetoothModule._on_error,  # Only ERR## passes _is_protocol_code
+}
@@ -1,20 +1,94 @@
 #!/usr/bin/env python3
 
-import random
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+import functools
+import hashlib
 import json
+import math
 import os
+import sys
+import threading
+import time
+
+from .utils import split_command
+
+try:
+    import orjson  # Optional C JSON encoder; falls back to the stdlib json module
+except ImportError:
+    orjson = None
+
+if TYPE_CHECKING:
+    import numpy as np
 
 YOLO: Any = None
 
+# Generator for mock results (faster than the legacy np.random global state), created on first use
+_RNG: Any = None
+
+@functools.lru_cache(maxsize=1024)
+def _abspath(path: str) -> str:
+    """os.path.abspath, memoized (the engine never changes its working directory)"""
+    return os.path.abspath(path)
+
+
+# Pre-escaped `"class": ` JSON fragments, built once per class name
+_JSON_KEYS: Dict[str, str] = {}
+
+
+def _results_json(result: Dict[str, Any]) -> str:
+    """Serialize a class -> confidence dict; same output as json.dumps"""
+    keys = _JSON_KEYS
+    parts = []
+    for name, conf in result.items():
+        key = keys.get(name)
+        if key is None:
+            key = keys[name] = json.dumps(name) + ": "
+        # repr matches json.dumps for finite floats only (it gives nan/inf, not NaN/Infinity)
+        parts.append(key + (repr(conf) if type(conf) is float and math.isfinite(conf) else json.dumps(conf)))
+    return "{" + ", ".join(parts) + "}"
+
+
+def _for_display(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Round confidences to 3 decimals for output"""
+    return {k: round(v, 3) if type(v) is float else v for k, v in result.items()}
+
+
+# Generic responses (errors, class lists); results always go through _results_json
+if orjson is not None:
+    def _dumps(obj: Any) -> str:
+        """Serialize to JSON with orjson"""
+        return orjson.dumps(obj).decode()
+else:
+    _dumps = json.dumps
+
 class ClassificationModule:
     """Classification module with static methods and fields"""
 
     is_initialized = False
     model: Any = None
 
-    # Known classes for classification
-    known_classes = ['aluminium', 'carton', 'e_waste', 'glass', 'organic_waste', 'paper_and_cardboard', 'plastic', "textile", "wood"]
+    input_size = 224  # square input the classifier was trained at
+    use_half = False  # FP16 inference, only enabled on CUDA
+    device = 'cpu'
+    max_batch: Optional[int] = None  # images per predict call; exported models are static batch 1
+
+    # ultralytics predictors are not thread-safe, and prewarm() runs on other threads
+    _model_lock = threading.Lock()
+    _last_inference = 0.0
+    _prewarm_idle = 30.0  # seconds idle before prewarm() bothers running the model
+    _class_names: Optional[List[str]] = None  # model output index -> class name
+
+    # Results of recent classifications, keyed by image identity (see _cache_key)
+    _cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+    _cache_size = 256
+    _cache_ttl = 300.0  # seconds
+
+    # Known classes for classification (a tuple, so it can be shared without copying)
+    known_classes = ('aluminium', 'carton', 'e_waste', 'glass', 'organic_waste', 'paper_and_cardboard', 'plastic', "textile", "wood")
+    # Class-dependent part of get_model_info, rebuilt only when the classes change
+    _model_info = {"classes": known_classes, "num_classes": len(known_classes)}
 
     @staticmethod
     def handle_command(args: list):
@@ -30,28 +104,69 @@ class ClassificationModule:
 
         elif subcommand == 'get-classes':
             classes = ClassificationModule.get_classes()
-            print(json.dumps(classes))
+            print(_dumps(classes))
+
+        elif subcommand.partition(' ')[0] == 'batch':
+            # `batch <path> <path> ...`: shell-quoted paths classified together in one model call
+            if not ClassificationModule.is_initialized:
+                print("Error: Classification not initialized")
+                return
+
+            try:
+                image_paths = split_command(subcommand.partition(' ')[2])
+            except ValueError as e:  # e.g. unbalanced quotes
+                print(_dumps({"error": f"Invalid batch paths: {e}"}))
+                return
+            if not image_paths:
+                print(_dumps({"error": "No image path provided"}))
+                return
+
+            results = ClassificationModule.classify_batch(image_paths)
+            if results:
+                print(f"Results: [{', '.join(_results_json(_for_display(r)) for r in results)}]")
+            else:
+                print(_dumps({"error": "Classification failed"}))
 
         elif len(args) >= 1:  # classify with image path
             if not ClassificationModule.is_initialized:
                 print("Error: Classification not initialized")
                 return
 
-            image_path = ' '.join(args)  # Join all args as image path
+            image_path = args[0]  # Full image path, unsplit by the engine
             if not image_path:
-                print(json.dumps({"error": "No image path provided"}))
+                print(_dumps({"error": "No image path provided"}))
                 return
 
             result = ClassificationModule.classify(image_path)
             if result:
-                print(f"Results: {json.dumps(result)}")
+                print(f"Results: {_results_json(_for_display(result))}")
             else:
-                print(json.dumps({"error": "Classification failed"}))
+                print(_dumps({"error": "Classification failed"}))
 
         else:
             print("Error: Unknown classification subcommand")
 
 
+    @staticmethod
+    def stream(lines, out):
+        """
+        Classify one image path per input line, writing one JSON result per
+        output line. Paths are taken verbatim, so spaces need no quoting.
+        Status and diagnostic prints go to stderr, so `out` carries only JSON.
+        """
+        with redirect_stdout(sys.stderr):
+            if not ClassificationModule.init():
+                return
+
+        for line in lines:
+            image_path = line.rstrip('\n')
+            if not image_path:
+                continue
+            with redirect_stdout(sys.stderr):
+                result = ClassificationModule.classify(image_path)
+            out.write((_results_json(_for_display(result)) if result else _dumps({"error": "Classification failed"})) + '\n')
+            out.flush()
+
     @staticmethod
     def init() -> bool:
         """Initialize classification module with lazy imports"""
@@ -64,11 +179,15 @@ class ClassificationModule:
             try:
                 global YOLO
                 if YOLO is None:
+                    # Only load CUDA kernels as they are used; must be set before torch initializes CUDA
+                    os.environ.setdefault('CUDA_MODULE_LOADING', 'LAZY')
                     from ultralytics import YOLO
 
                 # // Load model
-                model_path = os.path.abspath('classifier_model_yolo.pt')
-                ClassificationModule.model = YOLO(model_path)
+                ClassificationModule.model = ClassificationModule._load_model(os.path.abspath('classifier_model_yolo.pt'))
+
+                # Warm up once so the first real classify doesn't pay for lazy backend setup
+                ClassificationModule.prewarm()
 
             except Exception as e:
                 print(f"⚠️ Model loading failed: {e}. ")
@@ -82,28 +201,110 @@ class ClassificationModule:
             print(f"Error initializing classification: {e}")
             return False
 
+    @staticmethod
+    def _load_model(model_path: str) -> Any:
+        """
+        Load the fastest available form of the model: a TensorRT FP16 engine on
+        CUDA (built offline by export_engine.py), otherwise an INT8 or plain
+        ONNX export when packaged, otherwise the .pt itself
+        """
+        base_path = os.path.splitext(model_path)[0]
+
+        import torch
+        ClassificationModule.use_half = torch.cuda.is_available()
+        ClassificationModule.device = 0 if torch.cuda.is_available() else 'cpu'
+        ClassificationModule.max_batch = 1
+        engine_path = base_path + '.engine'
+        if torch.cuda.is_available() and os.path.exists(engine_path):
+            try:
+                return YOLO(engine_path, task='classify')
+            except Exception as e:
+                print(f"⚠️ TensorRT unavailable, using default backend: {e}")
+
+        onnx_path = next((p for p in (base_path + '.int8.onnx', base_path + '.onnx') if os.path.exists(p)), None)
+        if onnx_path:
+            return YOLO(onnx_path, task='classify')
+        ClassificationModule.max_batch = None
+        return YOLO(model_path)
+
     @staticmethod
     def classify(image_path: str) -> Optional[Dict[str, Any]]:
         """Classify an image and return confidence scores"""
+        # Basic validation - check if path is not empty
+        if not image_path:
+            return {"error": "No image path provided"}
+
+        results = ClassificationModule.classify_batch([image_path])
+        return results[0] if results else None
+
+    @staticmethod
+    def classify_batch(image_paths: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """Classify several images in one model call; returns one result per path"""
         if not ClassificationModule.is_initialized:
             print("Error: Classification not initialized")
             return None
 
         try:
-            # Basic validation - check if path is not empty
-            if not image_path:
-                return {"error": "No image path provided"}
-
             if ClassificationModule.model == "mock_model":
-                return ClassificationModule._mock_classify(image_path)
+                return [ClassificationModule._mock_classify(p) for p in image_paths]
             else:
-                # Actual YOLO classification
-                return ClassificationModule._yolo_classify(image_path)
+                # Actual YOLO classification, skipping images classified recently
+                keys = [ClassificationModule._cache_key(p) for p in image_paths]
+                results = [ClassificationModule._cache_get(k) for k in keys]
+                misses = [i for i, r in enumerate(results) if r is None]
+                if misses:
+                    fresh = ClassificationModule._yolo_classify([image_paths[i] for i in misses])
+                    if fresh is None:
+                        return None
+                    for i, result in zip(misses, fresh):
+                        ClassificationModule._cache_put(keys[i], result)
+                        results[i] = result
+                return results
 
         except Exception as e:
             print(f"Error during classification: {e}")
             return None
 
+    @staticmethod
+    def _cache_key(image_path: str) -> Optional[tuple]:
+        """Cheap image identity: size, mtime and a hash of the first 4 KB"""
+        try:
+            st = os.stat(image_path)
+            with open(image_path, 'rb') as f:
+                head = f.read(4096)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns, hashlib.blake2b(head, digest_size=16).digest()
+
+    @staticmethod
+    def _cache_get(key: Optional[tuple]) -> Optional[Dict[str, float]]:
+        """Return a cached result, dropping it if older than the TTL"""
+        entry = ClassificationModule._cache.get(key) if key else None
+        if entry is None:
+            return None
+        stamp, result = entry
+        if time.monotonic() - stamp > ClassificationModule._cache_ttl:
+            del ClassificationModule._cache[key]
+            return None
+        ClassificationModule._cache.move_to_end(key)
+        return dict(result)
+
+    @staticmethod
+    def _cache_put(key: Optional[tuple], result: Dict[str, float]):
+        """Store a result, evicting the least recently used entry when full"""
+        if key is None:
+            return
+        cache = ClassificationModule._cache
+        cache[key] = (time.monotonic(), dict(result))
+        cache.move_to_end(key)
+        if len(cache) > ClassificationModule._cache_size:
+            cache.popitem(last=False)
+
+    @staticmethod
+    def cache_clear():
+        """Forget all cached classification results"""
+        ClassificationModule._cache.clear()
+
     @staticmethod
     def stop():
         """Stop the classification module and free resources"""
@@ -120,7 +321,9 @@ class ClassificationModule:
                 print("✅ Classification model freed from memory")
 
             ClassificationModule.model = None
+            ClassificationModule._class_names = None
             ClassificationModule.is_initialized = False
+            ClassificationModule.cache_clear()
 
         except Exception as e:
             print(f"⚠️ Classification cleanup warning: {e}")
@@ -133,52 +336,118 @@ class ClassificationModule:
         """
         print(f"🎭 Mock classifying: {image_path}")
 
-        # Generate random weights
-        weights = [random.random() for _ in ClassificationModule.known_classes]
-        total_weight = sum(weights)
+        import numpy as np
+        global _RNG
+        if _RNG is None:
+            _RNG = np.random.default_rng()
 
-        # Normalize to create confidence values
-        confidences = {
-            cls: round(weight / total_weight, 2)
-            for cls, weight in zip(ClassificationModule.known_classes, weights)
-        }
+        # A flat Dirichlet draw gives uniformly random weights already normalized to 1
+        classes = ClassificationModule.known_classes
+        probs = _RNG.dirichlet(np.ones(len(classes)))
+
+        return dict(zip(classes, probs.tolist()))
+
+    @staticmethod
+    def _load_input(image_path: str) -> "np.ndarray":
+        """
+        Read an image as a BGR array (what ultralytics expects from numpy input),
+        resized on its short side and center-cropped to the model input size
+        """
+        import cv2
+
+        img = cv2.imread(image_path)
+        if img is None:
+            raise FileNotFoundError(f"Cannot read image: {image_path}")
+
+        size = ClassificationModule.input_size
+        h, w = img.shape[:2]
+        scale = size / min(h, w)
+        img = cv2.resize(img, (max(size, round(w * scale)), max(size, round(h * scale))), interpolation=cv2.INTER_AREA)
+        h, w = img.shape[:2]
+        top, left = (h - size) // 2, (w - size) // 2
+        return img[top:top + size, left:left + size]
 
-        return confidences
+    @staticmethod
+    def _predict(images: list) -> list:
+        """
+        Run the model on preprocessed images, in chunks of at most max_batch
+        (exported models have a static batch size); callers must hold _model_lock
+        """
+        import torch
+        step = ClassificationModule.max_batch or len(images)
+        results = []
+        with torch.inference_mode():
+            for i in range(0, len(images), step):
+                # Fixed shape, device and precision so predict never re-selects or re-sizes per call
+                results += ClassificationModule.model.predict(images[i:i + step], imgsz=ClassificationModule.input_size,
+                                                              half=ClassificationModule.use_half,
+                                                              device=ClassificationModule.device,
+                                                              augment=False, stream=False, verbose=False)
+        ClassificationModule._last_inference = time.monotonic()
+        return results
 
     @staticmethod
-    def _yolo_classify(image_path: str):
+    def prewarm():
         """
-        Perform actual YOLO classification
+        Run one dummy inference if the model has been idle, so the next real
+        classify starts hot. Safe to call from any thread; a no-op while the
+        model is busy or recently used.
         """
-        image_path = os.path.abspath(image_path)
-        # print(f"Abs path: {image_path}")
+        model = ClassificationModule.model
+        if model is None or model == "mock_model":
+            return
+        if time.monotonic() - ClassificationModule._last_inference < ClassificationModule._prewarm_idle:
+            return
+        if not ClassificationModule._model_lock.acquire(blocking=False):
+            return  # A real inference is running, which warms the model anyway
+        try:
+            import numpy as np
+            size = ClassificationModule.input_size
+            ClassificationModule._predict([np.zeros((size, size, 3), dtype=np.uint8)])
+        except Exception:
+            pass  # Warm-up is best effort; a real failure surfaces on the next classify
+        finally:
+            ClassificationModule._model_lock.release()
+
+    @staticmethod
+    def _yolo_classify(image_paths: List[str]) -> Optional[List[Dict[str, float]]]:
+        """
+        Perform actual YOLO classification on a batch of images
+        """
+        image_paths = [_abspath(p) for p in image_paths]
+        # print(f"Abs path: {image_paths}")
         model = ClassificationModule.model
         if model is None:
             print("Error: YOLO model not loaded")
             return None
 
-        # Run inference
-        results = model.predict(image_path, verbose=False)
-
-        class_names: dict[int, str] = results[0].names
-        probs = [round(float(i), 3) for i in list(results[0].probs.data)]
-
-        class_confidences = {}
+        # Run inference once for the whole batch, on arrays already at the model's input size
+        images = [ClassificationModule._load_input(p) for p in image_paths]
+        with ClassificationModule._model_lock:
+            results = ClassificationModule._predict(images)
 
-        for class_index, class_name in class_names.items():
-            class_confidences[class_name] = probs[class_index]
+        # Class names in index order, built once per model
+        names = ClassificationModule._class_names
+        if names is None:
+            class_names: dict[int, str] = results[0].names
+            names = ClassificationModule._class_names = [class_names[i] for i in range(len(class_names))]
 
-        return class_confidences
+        # Full precision here; rounding happens only when results are printed
+        return [dict(zip(names, result.probs.data.tolist())) for result in results]
 
     @staticmethod
-    def get_classes() -> list:
-        """Get the list of supported classification classes"""
-        return ClassificationModule.known_classes.copy()
+    def get_classes() -> tuple:
+        """Get the supported classification classes (immutable, so shared rather than copied)"""
+        return ClassificationModule.known_classes
 
     @staticmethod
     def set_classes(classes: list):
         """Set the list of classification classes"""
-        ClassificationModule.known_classes = classes.copy()
+        ClassificationModule.known_classes = tuple(classes)
+        ClassificationModule._model_info = {
+            "classes": ClassificationModule.known_classes,
+            "num_classes": len(ClassificationModule.known_classes)
+        }
         print(f"✅ Classification classes updated: {ClassificationModule.known_classes}")
 
     @staticmethod
@@ -187,6 +456,5 @@ class ClassificationModule:
         return {
             "initialized": ClassificationModule.is_initialized,
             "model_type": "mock" if ClassificationModule.model == "mock_model" else "yolo",
-            "classes": ClassificationModule.known_classes,
-            "num_classes": len(ClassificationModule.known_classes)
+            **ClassificationModule._model_info
         }
@@ -0,0 +1,27 @@
+import json
+import unittest
+
+from modules.classification_module import _results_json
+
+
+class ResultsJsonTest(unittest.TestCase):
+    """_results_json must stay byte-identical to json.dumps"""
+
+    def assertMatchesJsonDumps(self, result):
+        self.assertEqual(_results_json(result), json.dumps(result))
+
+    def test_confidences(self):
+        self.assertMatchesJsonDumps({"plastic": 0.912, "glass": 1e-07, "paper_and_cardboard": 0.0, "wood": 1.0})
+
+    def test_non_finite_values(self):
+        self.assertMatchesJsonDumps({"plastic": float("nan"), "glass": float("inf"), "wood": float("-inf")})
+
+    def test_other_values_and_escaped_names(self):
+        self.assertMatchesJsonDumps({'quote"d': 1, "tab\there": True, "ünïcode": None, "neg": -0.0})
+
+    def test_empty(self):
+        self.assertMatchesJsonDumps({})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from modules import rfcomm
+
+
+class RfcommIoctlTest(unittest.TestCase):
+    """Run the ioctl path with the socket module and ioctl call mocked out"""
+
+    def setUp(self):
+        patcher = mock.patch.object(rfcomm, "socket")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(rfcomm.fcntl, "ioctl")
+        self.ioctl = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_request_struct_matches_kernel_layout(self):
+        self.assertEqual(rfcomm._RFCOMM_DEV_REQ.size, 24)  # sizeof(struct rfcomm_dev_req)
+
+    def test_bind_releases_then_creates_without_flags(self):
+        self.assertTrue(rfcomm.bind("EC:E3:34:15:F2:62"))
+
+        (_, release_req, release_buf), (_, create_req, create_buf) = (c.args for c in self.ioctl.call_args_list)
+        self.assertEqual(release_req, rfcomm.RFCOMMRELEASEDEV)
+        self.assertEqual(rfcomm._RFCOMM_DEV_REQ.unpack(release_buf)[1], 1 << rfcomm.RFCOMM_HANGUP_NOW)
+
+        self.assertEqual(create_req, rfcomm.RFCOMMCREATEDEV)
+        dev_id, flags, src, dst, channel = rfcomm._RFCOMM_DEV_REQ.unpack(create_buf)
+        self.assertEqual((dev_id, flags, src, channel), (0, 0, bytes(6), 1))
+        self.assertEqual(dst, bytes.fromhex("62F21534E3EC"))
+
+    def test_ioctl_failure_returns_false(self):
+        self.ioctl.side_effect = PermissionError
+        self.assertFalse(rfcomm.bind("EC:E3:34:15:F2:62"))
+
+    def test_malformed_mac_returns_false_without_ioctl(self):
+        self.assertFalse(rfcomm.rfcomm_ioctl(rfcomm.RFCOMMCREATEDEV, "not-a-mac"))
+        self.assertFalse(rfcomm.rfcomm_ioctl(rfcomm.RFCOMMCREATEDEV, "EC:E3:34:15:F2"))
+        self.ioctl.assert_not_called()
+
+
+class RfcommCopiesTest(unittest.TestCase):
+    def test_desktop_copy_matches(self):
+        """The desktop protocol's copy at the repository root must not drift from this one"""
+        desktop_copy = Path(__file__).resolve().parents[4] / "rfcomm.py"
+        self.assertEqual(desktop_copy.read_text(), Path(rfcomm.__file__).read_text())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,10 +8,10 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import scrolledtext, simpledialog
 import threading
-import queue
+from collections import deque
 import time
-import base64
 import io
+import itertools
 import json
 import os
 import re
@@ -19,13 +19,77 @@ from datetime import datetime, timedelta
 from PIL import Image, ImageTk
 from typing import Optional, Dict, Any
 import subprocess
-from ultralytics import YOLO
 
 # Import our existing protocol
 from smartbin_pyserial_protocol import SmartBinPySerialProtocol
 
+try:
+    import orjson  # Optional C JSON encoder for the stats file; falls back to json
+except ImportError:
+    orjson = None
 
-recyclable_classes = {'plastic', 'glass', 'carton', "aluminium", "metal"}
+
+RECYCLABLE_CLASSES = frozenset(('plastic', 'glass', 'carton', "aluminium", "metal"))
+
+# Recyclable bin info
+RECYCLABLE_INFO = {
+    "plastic": {"emoji": "🥤", "color": "#2196F3"},
+    "glass": {"emoji": "🍾", "color": "#4CAF50"},
+    "carton": {"emoji": "📦", "color": "#FF9800"}
+}
+
+# Non-recyclable bin info
+NON_RECYCLABLE_INFO = {
+    "e_waste": {"emoji": "💻", "color": "#9C27B0"},
+    "textile": {"emoji": "�", "color": "#E91E63"},
+}
+
+# Trained 9-class classifier used by the GUI; an INT8 ONNX export next to it
+# (smartbin_flutter/lib/scripts/export_int8.py --weights ...) is preferred when present
+YOLO_MODEL_PATH = "runs/smartbin_9class/weights/best.pt"
+YOLO_INT8_MODEL_PATH = "runs/smartbin_9class/weights/best.int8.onnx"
+
+# Rank markers for the classification rows; later ranks use "📝"
+RANK_EMOJI = ("🥇", "🥈", "🥉")
+
+# Oldest message log lines are trimmed beyond this to keep the Text widget fast
+MAX_LOG_LINES = 2000
+
+# Bounding box for the on-screen image preview
+PREVIEW_SIZE = (400, 300)
+PREVIEW_BACKGROUND = (64, 64, 64)  # Letterbox color, matches the placeholder's gray25
+
+# GUI message queue bound; when full, log traffic is dropped before anything else
+MESSAGE_QUEUE_SIZE = 5000
+DROPPABLE_MESSAGES = frozenset(('sent', 'received'))
+# How often the Tk thread checks whether worker threads queued anything (ms)
+GUI_POLL_INTERVAL_MS = 30
+
+# Log line template and text tag for each plain-text GUI message type
+LOG_FORMATS = {
+    'sent': ("[%s] ➡️ SENT: %s", "sent"),
+    'received': ("[%s] ⬅️ RECV: %s", "received"),
+    'error': ("[%s] ❌ ERROR: %s", "error"),
+    'info': ("[%s] ℹ️ INFO: %s", "info"),
+}
+
+# JPEGs are decoded at the smallest libjpeg scale that still covers this size;
+# it is well above both the preview and the classifier input (224 px)
+DECODE_SIZE = (800, 600)
+
+# (second, "HH:MM:SS") of the last formatted timestamp, shared by all threads
+_timestamp_cache = (0, "")
+
+
+def _timestamp() -> str:
+    """Current local time as HH:MM:SS, formatted at most once per second"""
+    global _timestamp_cache
+    now = int(time.time())
+    second, text = _timestamp_cache
+    if now != second:
+        text = time.strftime("%H:%M:%S", time.localtime(now))
+        _timestamp_cache = (now, text)
+    return text
 
 
 class SmartBinGUI:
@@ -47,13 +111,33 @@ class SmartBinGUI:
         self.connected = False
         self.reconnect_attempts = 0
         self.auto_reconnect = True  # Enable automatic reconnection
+        self._reconnect_thread = None
+        self._reconnect_stop = threading.Event()  # Interrupts the reconnect loop's backoff wait
         self.max_reconnect_interval = 30  # Max delay between attempts (seconds)
         self.sudo_password = "Bmw372#"  # Stored sudo password for session
         
         # GUI state
         self.current_image = None
+        self.preview_photo = None  # Created on the first image, then updated in place
+        # Latest preview / result rows seen during a queue drain, rendered once at its end
+        self._pending_preview = None
+        self._pending_class_rows = None
         self.classification_data = {}
-        self.message_queue = queue.Queue()
+        self.message_queue = deque()  # append/popleft are atomic, no lock needed per message
+        self._dropped_messages = 0
+        self._drop_lock = threading.Lock()
+        self._tk_calls = deque()  # (callback, args) queued by worker threads, see _call_on_tk()
+        # Set by worker threads when they queue anything; only the Tk thread touches Tk
+        self._gui_work = threading.Event()
+        self._log_buffer = []  # (text, tag) pairs waiting to be written to the log
+        self._log_flush_pending = False
+        self._fonts = {}  # (size, weight) -> shared CTkFont, see _font()
+        self._yolo_model = None  # Loaded once by _get_yolo_model()
+        self._yolo_max_batch = None  # Images per predict call; None means unbounded
+        self._yolo_lock = threading.Lock()
+        self.count_labels = {}  # waste type -> bin count label
+        self._shown_counts = {}  # waste type -> count currently displayed
+        self._shown_coin_count = None  # coin count currently displayed
         
         # Persistent stats
         self.session_start_time = datetime.now()
@@ -79,6 +163,12 @@ class SmartBinGUI:
         # Load persistent stats
         self._load_persistent_stats()
         
+        # Stats are written by a background thread, and only when they changed
+        self._saved_stats = None
+        self._stats_to_write = None
+        self._stats_dirty = threading.Event()
+        threading.Thread(target=self._stats_writer, daemon=True).start()
+        
         # Initialize GUI
         self._setup_gui()
         
@@ -90,12 +180,22 @@ class SmartBinGUI:
         
         self._setup_protocol_integration()
         
+        # Load the classifier in the background so the first image doesn't wait for it
+        threading.Thread(target=self._preload_yolo_model, daemon=True).start()
+        
         # Start GUI update loop
         self._start_gui_updates()
         
         # Start stats update loop
         self._start_stats_updates()
     
+    def _font(self, size: int, weight: str = "normal") -> ctk.CTkFont:
+        """Return a shared CTkFont for (size, weight), creating the Tk font on first use"""
+        font = self._fonts.get((size, weight))
+        if font is None:
+            font = self._fonts[(size, weight)] = ctk.CTkFont(size=size, weight=weight)
+        return font
+    
     def _setup_gui(self):
         """Setup the main GUI layout"""
         # Configure grid weights
@@ -161,7 +261,7 @@ class SmartBinGUI:
         self.image_title = ctk.CTkLabel(
             self.image_frame, 
             text="🖼️ Last Captured Image",
-            font=ctk.CTkFont(size=16, weight="bold")
+            font=self._font(16, "bold")
         )
         self.image_title.pack(pady=(10, 5))
         
@@ -179,7 +279,7 @@ class SmartBinGUI:
         self.image_info = ctk.CTkLabel(
             self.image_frame,
             text="Size: - | Format: - | Timestamp: -",
-            font=ctk.CTkFont(size=12)
+            font=self._font(12)
         )
         self.image_info.pack(pady=(0, 10))
 
@@ -192,7 +292,7 @@ class SmartBinGUI:
         self.classification_title2 = ctk.CTkLabel(
             self.classification_frame2,
             text="🧪 Classification Section 2",
-            font=ctk.CTkFont(size=16, weight="bold")
+            font=self._font(16, "bold")
         )
         self.classification_title2.pack(pady=(10, 5))
 
@@ -200,11 +300,11 @@ class SmartBinGUI:
         self.classification_results2 = ctk.CTkFrame(self.classification_frame2)
         self.classification_results2.pack(fill="both", expand=True, padx=10, pady=10)
 
-        self.label_a = ctk.CTkLabel(self.classification_results2, text="Label A", font=ctk.CTkFont(size=14))
+        self.label_a = ctk.CTkLabel(self.classification_results2, text="Label A", font=self._font(14))
         self.label_a.pack(anchor="w", pady=2)
-        self.label_b = ctk.CTkLabel(self.classification_results2, text="Label B", font=ctk.CTkFont(size=14))
+        self.label_b = ctk.CTkLabel(self.classification_results2, text="Label B", font=self._font(14))
         self.label_b.pack(anchor="w", pady=2)
-        self.label_c = ctk.CTkLabel(self.classification_results2, text="Label C", font=ctk.CTkFont(size=14))
+        self.label_c = ctk.CTkLabel(self.classification_results2, text="Label C", font=self._font(14))
         self.label_c.pack(anchor="w", pady=2)
 
         return self.classification_frame2
@@ -218,7 +318,7 @@ class SmartBinGUI:
         self.classification_title = ctk.CTkLabel(
             self.classification_frame,
             text="📊 Classification Results",
-            font=ctk.CTkFont(size=16, weight="bold")
+            font=self._font(16, "bold")
         )
         self.classification_title.pack(pady=(10, 5))
         
@@ -230,10 +330,30 @@ class SmartBinGUI:
         self.no_classification_label = ctk.CTkLabel(
             self.classification_results,
             text="No classification data\nyet available",
-            font=ctk.CTkFont(size=14),
+            font=self._font(14),
             text_color=("gray50", "gray60")
         )
         self.no_classification_label.pack(expand=True)
+        
+        # Result rows are created on first use and then reconfigured in place
+        self.class_rows = []
+        self.class_time_label = ctk.CTkLabel(
+            self.classification_results,
+            text="",
+            font=self._font(12),
+            text_color=("gray60", "gray40")
+        )
+    
+    def _get_class_row(self, index: int) -> Dict[str, Any]:
+        """Return the reusable classification row at index, creating rows as needed"""
+        while len(self.class_rows) <= index:
+            frame = ctk.CTkFrame(self.classification_results)
+            label = ctk.CTkLabel(frame, text="", font=self._font(14))
+            label.pack(side="left", padx=10, pady=5)
+            progress = ctk.CTkProgressBar(frame, width=150, height=10)
+            progress.pack(side="right", padx=10, pady=5)
+            self.class_rows.append({'frame': frame, 'label': label, 'progress': progress, 'shown': False})
+        return self.class_rows[index]
     
     def _create_bin_status_section(self):
         """Create the bin status visualization section"""
@@ -244,7 +364,7 @@ class SmartBinGUI:
         self.bin_status_title = ctk.CTkLabel(
             self.bin_status_frame,
             text="🗂️ Bin Status",
-            font=ctk.CTkFont(size=16, weight="bold")
+            font=self._font(16, "bold")
         )
         self.bin_status_title.pack(pady=(10, 5))
         
@@ -262,6 +382,7 @@ class SmartBinGUI:
             "textile": 0,
             "e_waste": 0
         }
+        self.known_classes = frozenset(self.bin_counts)
         self.bin_capacity = 10
         self.coin_count = 7
         self.coin_capacity = 10;
@@ -270,20 +391,6 @@ class SmartBinGUI:
     
     def _create_bin_visualizations(self):
         """Create the bin and coin visualizations for 9-class system"""
-        # Recyclable bin info
-        recyclable_info = {
-            "plastic": {"emoji": "🥤", "color": "#2196F3"},
-            "glass": {"emoji": "🍾", "color": "#4CAF50"},
-            "carton": {"emoji": "📦", "color": "#FF9800"}
-        }
-        
-        # Non-recyclable bin info
-        non_recyclable_info = {
-            "e_waste": {"emoji": "💻", "color": "#9C27B0"},
-            "textile": {"emoji": "�", "color": "#E91E63"},
-
-        }
-        
         # Create recyclable section
         recyclable_frame = ctk.CTkFrame(self.bin_grid)
         recyclable_frame.grid(row=0, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
@@ -291,7 +398,7 @@ class SmartBinGUI:
         recyclable_title = ctk.CTkLabel(
             recyclable_frame,
             text="♻️ Recyclable Materials",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=self._font(14, "bold"),
             text_color="#4CAF50"
         )
         recyclable_title.pack(pady=(5, 2))
@@ -300,7 +407,7 @@ class SmartBinGUI:
         recyclable_grid = ctk.CTkFrame(recyclable_frame)
         recyclable_grid.pack(fill="x", padx=5, pady=5)
         
-        for i, (waste_type, info) in enumerate(recyclable_info.items()):
+        for i, (waste_type, info) in enumerate(RECYCLABLE_INFO.items()):
             row = i // 3
             col = i % 3
             
@@ -316,7 +423,7 @@ class SmartBinGUI:
             item_label = ctk.CTkLabel(
                 item_frame,
                 text=f"{info['emoji']}\n{waste_type.replace('_', ' ').title()[:8]}",
-                font=ctk.CTkFont(size=10, weight="bold")
+                font=self._font(10, "bold")
             )
             item_label.pack(pady=2)
             
@@ -324,13 +431,13 @@ class SmartBinGUI:
             count_label = ctk.CTkLabel(
                 item_frame,
                 text=f"{self.bin_counts[waste_type]}",
-                font=ctk.CTkFont(size=12, weight="bold"),
+                font=self._font(12, "bold"),
                 text_color=info['color']
             )
             count_label.pack(pady=2)
             
             # Store references for updates
-            setattr(self, f"{waste_type}_count_label", count_label)
+            self.count_labels[waste_type] = count_label
         
         # Create non-recyclable section
         non_recyclable_frame = ctk.CTkFrame(self.bin_grid)
@@ -339,7 +446,7 @@ class SmartBinGUI:
         non_recyclable_title = ctk.CTkLabel(
             non_recyclable_frame,
             text="🗑️ Non-Recyclable Materials",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=self._font(14, "bold"),
             text_color="#F44336"
         )
         non_recyclable_title.pack(pady=(5, 2))
@@ -348,7 +455,7 @@ class SmartBinGUI:
         non_recyclable_grid = ctk.CTkFrame(non_recyclable_frame)
         non_recyclable_grid.pack(fill="x", padx=5, pady=5)
         
-        for i, (waste_type, info) in enumerate(non_recyclable_info.items()):
+        for i, (waste_type, info) in enumerate(NON_RECYCLABLE_INFO.items()):
             row = i // 2
             col = i % 2
             
@@ -364,7 +471,7 @@ class SmartBinGUI:
             item_label = ctk.CTkLabel(
                 item_frame,
                 text=f"{info['emoji']}\n{waste_type.replace('_', ' ').title()}",
-                font=ctk.CTkFont(size=10, weight="bold")
+                font=self._font(10, "bold")
             )
             item_label.pack(pady=2)
             
@@ -372,13 +479,13 @@ class SmartBinGUI:
             count_label = ctk.CTkLabel(
                 item_frame,
                 text=f"{self.bin_counts[waste_type]}",
-                font=ctk.CTkFont(size=12, weight="bold"),
+                font=self._font(12, "bold"),
                 text_color=info['color']
             )
             count_label.pack(pady=2)
             
             # Store references for updates
-            setattr(self, f"{waste_type}_count_label", count_label)
+            self.count_labels[waste_type] = count_label
         
         # Coin dispenser display
         coin_frame = ctk.CTkFrame(self.bin_grid)
@@ -387,7 +494,7 @@ class SmartBinGUI:
         coin_label = ctk.CTkLabel(
             coin_frame,
             text="🪙 Coin Dispenser",
-            font=ctk.CTkFont(size=14, weight="bold")
+            font=self._font(14, "bold")
         )
         coin_label.pack(pady=(5, 2))
         
@@ -403,7 +510,7 @@ class SmartBinGUI:
         self.coin_count_label = ctk.CTkLabel(
             coin_frame,
             text=f"{self.coin_count}/{self.coin_capacity} coins",
-            font=ctk.CTkFont(size=12)
+            font=self._font(12)
         )
         self.coin_count_label.pack(pady=(2, 5))
     
@@ -419,7 +526,7 @@ class SmartBinGUI:
         self.message_title = ctk.CTkLabel(
             self.message_header,
             text="💬 Communication Log",
-            font=ctk.CTkFont(size=16, weight="bold")
+            font=self._font(16, "bold")
         )
         self.message_title.pack(side="left")
         
@@ -475,7 +582,7 @@ class SmartBinGUI:
         self.status_label = ctk.CTkLabel(
             self.connection_frame,
             text="🔴 Disconnected",
-            font=ctk.CTkFont(size=14, weight="bold")
+            font=self._font(14, "bold")
         )
         self.status_label.pack(side="left", padx=(0, 10))
         
@@ -517,7 +624,7 @@ class SmartBinGUI:
         self.command_label = ctk.CTkLabel(
             self.command_frame,
             text="📤 Send Command:",
-            font=ctk.CTkFont(size=14, weight="bold")
+            font=self._font(14, "bold")
         )
         self.command_label.pack(side="left", padx=(0, 10))
         
@@ -539,6 +646,27 @@ class SmartBinGUI:
         )
         self.send_btn.pack(side="left", padx=(0, 10))
 
+    def _get_yolo_model(self):
+        """Return the YOLO classifier, loading the weights on first use"""
+        with self._yolo_lock:
+            if self._yolo_model is None:
+                from ultralytics import YOLO
+                if os.path.exists(YOLO_INT8_MODEL_PATH):
+                    # The ONNX export has a static batch size of 1
+                    self._yolo_max_batch = 1
+                    self._yolo_model = YOLO(YOLO_INT8_MODEL_PATH, task="classify")
+                else:
+                    self._yolo_max_batch = None
+                    self._yolo_model = YOLO(YOLO_MODEL_PATH)
+            return self._yolo_model
+    
+    def _preload_yolo_model(self):
+        """Load the classifier ahead of the first image (background thread)"""
+        try:
+            self._get_yolo_model()
+        except Exception as e:
+            print(f"⚠️ Could not preload YOLO model: {e}")
+    
     def _setup_protocol_integration(self):
         """Setup integration with the PySerial protocol"""
         # Create a custom protocol class that sends messages to GUI
@@ -550,12 +678,21 @@ class SmartBinGUI:
             def _setup_rfcomm_binding(self) -> bool:
                 """Setup RFCOMM binding with GUI password prompt"""
                 try:
-                    self.gui.message_queue.put({
+                    self.gui._post_message({
                         'type': 'info',
                         'message': f"Setting up Bluetooth connection to {self.esp32_mac}...",
-                        'timestamp': datetime.now().strftime("%H:%M:%S")
+                        'timestamp': _timestamp()
                     })
                     
+                    # Fast path: bind via ioctl when the process has CAP_NET_ADMIN (no sudo needed)
+                    if self._bind_rfcomm_direct():
+                        self.gui._post_message({
+                            'type': 'info',
+                            'message': f"✅ RFCOMM device bound to {self.rfcomm_device}",
+                            'timestamp': _timestamp()
+                        })
+                        return True
+                    
                     # First, try to release any existing binding
                     try:
                         release_cmd = ["sudo", "rfcomm", "release", "0"]
@@ -566,10 +703,10 @@ class SmartBinGUI:
                     # Get password from GUI
                     password = self.gui._get_sudo_password()
                     if not password:
-                        self.gui.message_queue.put({
+                        self.gui._post_message({
                             'type': 'error',
                             'message': "Password required for Bluetooth setup",
-                            'timestamp': datetime.now().strftime("%H:%M:%S")
+                            'timestamp': _timestamp()
                         })
                         return False
                     
@@ -586,52 +723,51 @@ class SmartBinGUI:
                     stdout, stderr = bind_process.communicate(input=password + "\n", timeout=10)
                     
                     if bind_process.returncode != 0:
-                        self.gui.message_queue.put({
+                        self.gui._post_message({
                             'type': 'error',
                             'message': f"Failed to bind RFCOMM: {stderr}",
-                            'timestamp': datetime.now().strftime("%H:%M:%S")
+                            'timestamp': _timestamp()
                         })
                         return False
                     
                     self.rfcomm_bound = True
-                    self.gui.message_queue.put({
+                    self.gui._post_message({
                         'type': 'info',
                         'message': f"✅ RFCOMM device bound to {self.rfcomm_device}",
-                        'timestamp': datetime.now().strftime("%H:%M:%S")
+                        'timestamp': _timestamp()
                     })
                     
                     time.sleep(1)
                     return True
                     
                 except Exception as e:
-                    self.gui.message_queue.put({
+                    self.gui._post_message({
                         'type': 'error',
                         'message': f"Failed to setup RFCOMM binding: {e}",
-                        'timestamp': datetime.now().strftime("%H:%M:%S")
+                        'timestamp': _timestamp()
                     })
                     return False
             
-            def _process_line(self, line: str):
-                """Override to send messages to GUI"""
-                # Send to GUI message queue
-                self.gui.message_queue.put({
+            def _handle_text_line(self, line: str):
+                """Override to send non-protocol lines to GUI
+                
+                Protocol lines are logged once, already parsed, by _handle_protocol_message.
+                """
+                self.gui._post_message({
                     'type': 'received',
                     'message': line,
-                    'timestamp': datetime.now().strftime("%H:%M:%S")
+                    'timestamp': _timestamp()
                 })
-                
-                # Call parent method for protocol handling
-                super()._process_line(line)
             
             def _send_message(self, code: str, content: str = "") -> bool:
                 """Override to log sent messages to GUI"""
                 message = f"{code} {content}".strip()
                 
                 # Send to GUI message queue
-                self.gui.message_queue.put({
+                self.gui._post_message({
                     'type': 'sent',
                     'message': message,
-                    'timestamp': datetime.now().strftime("%H:%M:%S")
+                    'timestamp': _timestamp()
                 })
                 
                 # Call parent method
@@ -640,47 +776,99 @@ class SmartBinGUI:
             def _handle_protocol_message(self, code: str, content: str):
                 """Override to handle GUI-specific protocol messages"""
                 # Send protocol message to GUI
-                self.gui.message_queue.put({
+                self.gui._post_message({
                     'type': 'protocol',
                     'code': code,
                     'content': content,
-                    'timestamp': datetime.now().strftime("%H:%M:%S")
+                    'timestamp': _timestamp()
                 })
                 
                 # Call parent method
                 super()._handle_protocol_message(code, content)
             
             def _process_complete_image(self):
-                """Override to send image data to GUI"""
+                """Override to hand the image to the classification worker
+                
+                Only the cheap header parse happens here, so the reader thread goes
+                straight back to the port; decoding and the preview happen on the worker.
+                """
                 try:
-                    # Reconstruct image (same as parent)
-                    base64_data = ""
-                    for i in range(1, self.expected_parts + 1):
-                        if i in self.image_parts:
-                            base64_data += self.image_parts[i]
-                        else:
-                            self.gui.message_queue.put({
-                                'type': 'error',
-                                'message': f"Missing image part {i}",
-                                'timestamp': datetime.now().strftime("%H:%M:%S")
-                            })
-                            return
+                    # Parts were decoded as they arrived (same as parent)
+                    image_data, missing = self._finish_image_data()
+                    if image_data is None:
+                        self.gui._post_message({
+                            'type': 'error',
+                            'message': f"Missing image part {missing}",
+                            'timestamp': _timestamp()
+                        })
+                        return
                     
-                    # Decode image
-                    image_data = base64.b64decode(base64_data)
+                    # Open lazily (header only); pixels are decoded on the worker
                     image = Image.open(io.BytesIO(image_data))
+                    metadata = self.image_metadata.copy()
+                    # draft() shrinks image.size to the reduced decode size, so keep the real one
+                    metadata['original_size'] = image.size
+                    image.draft("RGB", DECODE_SIZE)  # No-op for non-JPEG images
                     
-                    # Send image to GUI
-                    self.gui.message_queue.put({
-                        'type': 'image',
-                        'image': image,
-                        'metadata': self.image_metadata.copy(),
-                        'timestamp': datetime.now().strftime("%H:%M:%S")
+                    # Queue for classification; the worker batches images arriving together
+                    self._queue_for_inference(image, metadata)
+                
+                except Exception as e:
+                    self.gui._post_message({
+                        'type': 'error',
+                        'message': f"Image processing error: {e}",
+                        'timestamp': _timestamp()
                     })
+                
+                finally:
+                    # Reset state
+                    self.waiting_for_image = False
+                    self._reset_image_state()
+            
+            def _show_image(self, image: Image.Image, metadata: Dict) -> bool:
+                """Decode an image, build its preview and send both to the GUI (worker thread)"""
+                try:
+                    image.load()
+                    
+                    # Build the preview here so the Tk thread only has to wrap it
+                    preview = image.copy()
+                    # BILINEAR is plenty for a preview and much cheaper than LANCZOS
+                    # (Pillow-SIMD, a drop-in Pillow replacement, speeds this up further)
+                    preview.thumbnail(PREVIEW_SIZE, Image.Resampling.BILINEAR)
                     
-                    # Perform classification using YOLO backend
-                    classification_result = self._classify_with_yolo_backend(image)
+                    # Letterbox into the fixed preview box so the GUI can paste it into one PhotoImage
+                    canvas = Image.new("RGB", PREVIEW_SIZE, PREVIEW_BACKGROUND)
+                    canvas.paste(preview, ((PREVIEW_SIZE[0] - preview.width) // 2,
+                                           (PREVIEW_SIZE[1] - preview.height) // 2))
                     
+                    self.gui._post_message({
+                        'type': 'image',
+                        'image': image,
+                        'preview': canvas,
+                        'metadata': metadata,
+                        'timestamp': _timestamp()
+                    })
+                    return True
+                
+                except Exception as e:
+                    self.gui._post_message({
+                        'type': 'error',
+                        'message': f"Image processing error: {e}",
+                        'timestamp': _timestamp()
+                    })
+                    return False
+            
+            def _classify_batch(self, items: list):
+                """Show and classify a batch of queued images with one YOLO pass and report each result"""
+                images = [image for image, metadata in items if self._show_image(image, metadata)]
+                if not images:
+                    return
+                for classification_result in self._classify_with_yolo_backend(images):
+                    self._handle_classification_result(classification_result)
+            
+            def _handle_classification_result(self, classification_result: Dict[str, Any]):
+                """Send one classification result to the GUI and the ESP32"""
+                try:
                     if classification_result["success"]:
                         classification = classification_result["result"]
                         confidence = classification_result["confidence"]
@@ -693,12 +881,12 @@ class SmartBinGUI:
                         print(f"   All Classes: {all_classes}")
                         
                         # Send classification to GUI (full detailed result)
-                        self.gui.message_queue.put({
+                        self.gui._post_message({
                             'type': 'classification',
                             'result': classification,
                             'confidence': confidence,
                             'all_classes': all_classes,
-                            'timestamp': datetime.now().strftime("%H:%M:%S")
+                            'timestamp': _timestamp()
                         })
                         
                         # # Map classification to binary for ESP32
@@ -707,7 +895,7 @@ class SmartBinGUI:
                         # }
                         
                         # Determine if item is recyclable
-                        if classification.lower() in recyclable_classes:
+                        if classification.lower() in RECYCLABLE_CLASSES:
                             binary_result = "recyclable"
                         else:
                             binary_result = "non-recyclable"
@@ -715,109 +903,97 @@ class SmartBinGUI:
                         # Send binary classification result to ESP32
                         esp32_command = f"{binary_result} {confidence:.2f}"
                         if self._send_message("CLS01", esp32_command):
-                            self.gui.message_queue.put({
+                            self.gui._post_message({
                                 'type': 'info',
                                 'message': f"✅ Sent to ESP32: {esp32_command} (from {classification})",
-                                'timestamp': datetime.now().strftime("%H:%M:%S")
+                                'timestamp': _timestamp()
                             })
                     else:
                         # Classification failed - no fallback
                         error_msg = classification_result.get('error', 'Unknown classification error')
-                        self.gui.message_queue.put({
+                        self.gui._post_message({
                             'type': 'error',
                             'message': f"❌ YOLO classification FAILED: {error_msg}",
-                            'timestamp': datetime.now().strftime("%H:%M:%S")
+                            'timestamp': _timestamp()
                         })
                         
                         # Send error to ESP32
                         if self._send_message("CLS01", "ERROR 0.00"):
-                            self.gui.message_queue.put({
+                            self.gui._post_message({
                                 'type': 'info', 
                                 'message': f"🚨 Sent ERROR status to ESP32",
-                                'timestamp': datetime.now().strftime("%H:%M:%S")
+                                'timestamp': _timestamp()
                             })
                 
                 except Exception as e:
-                    self.gui.message_queue.put({
+                    self.gui._post_message({
                         'type': 'error',
                         'message': f"Image processing error: {e}",
-                        'timestamp': datetime.now().strftime("%H:%M:%S")
+                        'timestamp': _timestamp()
                     })
-                
-                finally:
-                    # Reset state
-                    self.waiting_for_image = False
-                    self.image_metadata = {}
-                    self.image_parts = {}
-                    self.expected_parts = 0
             
-            def _classify_with_yolo_backend(self, image: Image.Image) -> Dict[str, Any]:
-                """Classify image using official Ultralytics YOLO model directly"""
+            def _classify_with_yolo_backend(self, images: list) -> list:
+                """Classify a batch of images using official Ultralytics YOLO model directly"""
                 try:
-                    import tempfile
-                    import os
-                    from ultralytics import YOLO
                     import numpy as np
-                    # Save image to temporary file
-                    with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp_file:
-                        image.save(tmp_file.name, 'JPEG')
-                        tmp_path = tmp_file.name
                     try:
                         # Commented out subprocess logic
                         # model_path = "runs/smartbin_9class/weights/best.pt"
                         # cmd = [ ... ]
                         # result = subprocess.run(cmd, ...)
                         # ...existing code...
-                        self.gui.message_queue.put({
-                            'type': 'info',
-                            'message': f"🔄 Running YOLO classification on {tmp_path}",
-                            'timestamp': datetime.now().strftime("%H:%M:%S")
-                        })
-                        # Load model
-                        model_path = "runs/smartbin_9class/weights/best.pt"
-                        model = YOLO(model_path)
-                        # Run prediction
-                        results = model.predict(tmp_path, task="classify", verbose=False)
-                        # Extract confidences and class names
-                        confidences = [float(c) for c in list(results[0].probs.data)]
-                        class_names = results[0].names
-                        # Find top class
-                        top_idx = int(np.argmax(confidences))
-                        top_class = class_names[top_idx]
-                        top_confidence = confidences[top_idx]
-                        all_confidences = {class_names[i]: round(confidences[i], 4) for i in range(len(class_names))}
-                        self.gui.message_queue.put({
+                        self.gui._post_message({
                             'type': 'info',
-                            'message': f"✅ YOLO classification successful: {top_class}",
-                            'timestamp': datetime.now().strftime("%H:%M:%S")
+                            'message': f"🔄 Running YOLO classification on {len(images)} image(s)",
+                            'timestamp': _timestamp()
                         })
-                        return {
-                            "success": True,
-                            "result": top_class,
-                            "confidence": top_confidence,
-                            "all_confidences": all_confidences
-                        }
+                        # Model is loaded once and shared across calls and reconnects
+                        model = self.gui._get_yolo_model()
+                        # Predict on the decoded PIL images directly, as few calls as the model's batch size allows
+                        step = self.gui._yolo_max_batch or len(images)
+                        results = []
+                        for i in range(0, len(images), step):
+                            results += model.predict(images[i:i + step], task="classify", verbose=False)
+                        batch_results = []
+                        for result in results:
+                            # Copy the probability tensor out once and rank it in numpy
+                            probs = result.probs.data.cpu().numpy()
+                            class_names = result.names
+                            order = np.argsort(probs)[::-1].tolist()
+                            confidences = probs.tolist()
+                            # Find top class
+                            top_idx = order[0]
+                            top_class = class_names[top_idx]
+                            top_confidence = confidences[top_idx]
+                            # Built in descending confidence order, so the display needs no sort
+                            all_confidences = {class_names[i]: round(confidences[i], 4) for i in order}
+                            self.gui._post_message({
+                                'type': 'info',
+                                'message': f"✅ YOLO classification successful: {top_class}",
+                                'timestamp': _timestamp()
+                            })
+                            batch_results.append({
+                                "success": True,
+                                "result": top_class,
+                                "confidence": top_confidence,
+                                "all_confidences": all_confidences
+                            })
+                        return batch_results
                     except Exception as e:
-                        self.gui.message_queue.put({
+                        self.gui._post_message({
                             'type': 'error',
                             'message': f"❌ YOLO classification error: {e}",
-                            'timestamp': datetime.now().strftime("%H:%M:%S")
+                            'timestamp': _timestamp()
                         })
-                        return {
+                        return [{
                             "success": False,
                             "error": str(e)
-                        }
-                    finally:
-                        # Clean up temporary file
-                        try:
-                            os.unlink(tmp_path)
-                        except:
-                            pass
+                        }] * len(images)
                 except Exception as e:
-                    return {
+                    return [{
                         "success": False,
                         "error": f"YOLO model integration error: {e}"
-                    }
+                    }] * len(images)
         
         self.protocol_class = GUIProtocol
     
@@ -828,9 +1004,10 @@ class SmartBinGUI:
             if hasattr(self, 'sudo_password') and self.sudo_password:
                 return self.sudo_password
             else:
-                # Fallback to dialog if somehow not set
+                # Fallback to dialog if somehow not set (called from the protocol thread)
                 from tkinter import messagebox
-                messagebox.showerror(
+                self._call_on_tk(
+                    messagebox.showerror,
                     "Password Not Available",
                     "Administrator password was not set during startup.\n"
                     "Please restart the application."
@@ -867,13 +1044,13 @@ class SmartBinGUI:
                 )
                 return False
             
-            # Test the password by running a simple sudo command
-            import subprocess
-            test_cmd = f"echo '{password}' | sudo -S echo 'Password verified'"
+            # Test the password by running a no-op under sudo; the password goes in on
+            # stdin, so it never appears in a shell command line or process argv.
+            # -k ignores any cached sudo ticket so the password is actually checked.
             try:
                 result = subprocess.run(
-                    test_cmd, 
-                    shell=True, 
+                    ["sudo", "-S", "-k", "true"],
+                    input=password + "\n",
                     capture_output=True, 
                     text=True, 
                     timeout=10
@@ -924,43 +1101,115 @@ class SmartBinGUI:
     
     def _start_gui_updates(self):
         """Start the GUI update loop"""
-        self._update_gui()
+        self._poll_gui_work()
+    
+    def _poll_gui_work(self):
+        """Drain work queued by worker threads, then re-arm (Tk thread)
+        
+        Worker threads never call into Tk themselves (a cross-thread Tk call
+        blocks until the mainloop services it, and fails once the root is gone),
+        so this timer is the only way their messages and callbacks reach the GUI.
+        """
+        if self._gui_work.is_set():
+            self._gui_work.clear()
+            self._update_gui()
+        self.root.after(GUI_POLL_INTERVAL_MS, self._poll_gui_work)
+    
+    def _call_on_tk(self, callback, *args):
+        """Run callback(*args) on the Tk thread at the next poll (safe to call from any thread)"""
+        self._tk_calls.append((callback, args))
+        self._gui_work.set()
+    
+    def _post_message(self, data: Dict[str, Any]):
+        """Queue a message for the GUI thread (safe to call from any thread)
+        
+        The message is picked up by the next _poll_gui_work pass. If the GUI
+        falls behind and the queue fills up, sent/received log lines are dropped;
+        other messages displace the oldest queued one instead.
+        """
+        messages = self.message_queue
+        if len(messages) < MESSAGE_QUEUE_SIZE:
+            messages.append(data)
+        else:
+            if data['type'] not in DROPPABLE_MESSAGES:
+                try:
+                    messages.popleft()
+                except IndexError:
+                    pass
+                messages.append(data)
+            with self._drop_lock:
+                self._dropped_messages += 1
+        self._gui_work.set()
     
     def _update_gui(self):
-        """Update GUI with messages from the queue"""
-        try:
-            # Process all messages in queue
-            while not self.message_queue.empty():
-                message_data = self.message_queue.get_nowait()
-                self._handle_gui_message(message_data)
-        except queue.Empty:
-            pass
+        """Update GUI with callbacks and messages queued by worker threads"""
+        calls = self._tk_calls
+        while True:
+            try:
+                callback, args = calls.popleft()
+            except IndexError:
+                break
+            callback(*args)
         
-        # Schedule next update
-        self.root.after(100, self._update_gui)
+        with self._drop_lock:
+            dropped, self._dropped_messages = self._dropped_messages, 0
+        
+        if dropped:
+            self._add_message(f"[GUI] ⚠️ {dropped} messages dropped (GUI falling behind)", "error")
+        
+        messages = self.message_queue
+        while True:
+            try:
+                message_data = messages.popleft()
+            except IndexError:
+                break
+            self._handle_gui_message(message_data)
+        
+        # Only the newest image and result of a burst are worth painting
+        self._render_pending_displays()
+        
+        # Everything logged during this pass goes out in one insert
+        self._flush_messages()
+    
+    def _render_pending_displays(self):
+        """Paint the latest preview and classification rows recorded during the drain"""
+        if self._pending_preview is not None:
+            preview, info_text = self._pending_preview
+            self._pending_preview = None
+            try:
+                # Reuse one PhotoImage; the preview is always exactly PREVIEW_SIZE
+                if self.preview_photo is None:
+                    self.preview_photo = ImageTk.PhotoImage("RGB", PREVIEW_SIZE)
+                    self.image_label.configure(image=self.preview_photo, text="")
+                self.preview_photo.paste(preview)
+                self.image_info.configure(text=info_text)
+            except Exception as e:
+                self._add_message(f"[{_timestamp()}] ❌ ERROR: Failed to display image: {e}", "error")
+        
+        if self._pending_class_rows is not None:
+            sorted_classes, timestamp = self._pending_class_rows
+            self._pending_class_rows = None
+            try:
+                self._show_class_rows(sorted_classes, timestamp)
+            except Exception as e:
+                self._add_message(f"[{timestamp}] ❌ ERROR: Failed to update classification: {e}", "error")
     
     def _handle_gui_message(self, data: Dict[str, Any]):
         """Handle different types of messages from the protocol"""
         msg_type = data['type']
         timestamp = data['timestamp']
         
-        if msg_type == 'sent':
-            self._add_message(f"[{timestamp}] ➡️ SENT: {data['message']}", "sent")
-        
-        elif msg_type == 'received':
-            self._add_message(f"[{timestamp}] ⬅️ RECV: {data['message']}", "received")
+        # Plain log messages (the bulk of the traffic) take a single lookup
+        log_format = LOG_FORMATS.get(msg_type)
+        if log_format is not None:
+            template, tag = log_format
+            self._add_message(template % (timestamp, data['message']), tag)
         
         elif msg_type == 'protocol':
             self._add_message(f"[{timestamp}] 🔧 PROTOCOL: {data['code']} {data['content']}", "info")
         
-        elif msg_type == 'error':
-            self._add_message(f"[{timestamp}] ❌ ERROR: {data['message']}", "error")
-        
-        elif msg_type == 'info':
-            self._add_message(f"[{timestamp}] ℹ️ INFO: {data['message']}", "info")
-        
         elif msg_type == 'image':
-            self._update_image_display(data['image'], data['metadata'], timestamp)
+            self._update_image_display(data['image'], data['preview'], data['metadata'], timestamp)
         
         elif msg_type == 'classification':
             self._update_classification_display(
@@ -979,21 +1228,18 @@ class SmartBinGUI:
             self.bin_counts[classified_item] += 1
             
             # Update the visual display
-            count_label = getattr(self, f"{classified_item}_count_label", None)
-            if count_label:
-                count_label.configure(text=f"{self.bin_counts[classified_item]}")
+            self._show_bin_count(classified_item)
             
             # # Check if item is recyclable for coin dispensing
             # recyclable_classes = {
             #     'plastic', 'glass', 'carton'
             # }
             
-            if classified_item.lower() in recyclable_classes:
+            if classified_item.lower() in RECYCLABLE_CLASSES:
                 # Simulate coin dispensing (decrease coin count)
                 if self.coin_count > 0:
                     self.coin_count -= 1
-                    self.coin_progress.set(self.coin_count / self.coin_capacity)
-                    self.coin_count_label.configure(text=f"{self.coin_count}/{self.coin_capacity} coins")
+                    self._show_coin_count()
                     coin_msg = f" | Coin dispensed! Remaining: {self.coin_count}"
                 else:
                     coin_msg = " | No coins left to dispense!"
@@ -1002,64 +1248,92 @@ class SmartBinGUI:
             
             self._add_message(f"[BIN UPDATE] {classified_item.replace('_', ' ').title()}: {self.bin_counts[classified_item]}{coin_msg}", "info")
     
+    def _show_bin_count(self, waste_type: str):
+        """Refresh a bin count label, skipping the redraw when the value is unchanged"""
+        count_label = self.count_labels.get(waste_type)
+        count = self.bin_counts[waste_type]
+        if count_label is not None and self._shown_counts.get(waste_type) != count:
+            count_label.configure(text=f"{count}")
+            self._shown_counts[waste_type] = count
+    
+    def _show_coin_count(self):
+        """Refresh the coin dispenser display, skipping the redraw when the count is unchanged"""
+        if self._shown_coin_count != self.coin_count:
+            self.coin_progress.set(self.coin_count / self.coin_capacity)
+            self.coin_count_label.configure(text=f"{self.coin_count}/{self.coin_capacity} coins")
+            self._shown_coin_count = self.coin_count
+    
     def _update_bin_visualization(self):
         """Update bin visualization with persistent stats for 9-class system"""
         try:
             # Update counts from bin_counts dictionary
-            for waste_type, count in self.bin_counts.items():
-                count_label = getattr(self, f"{waste_type}_count_label", None)
-                if count_label:
-                    count_label.configure(text=f"{count}")
+            for waste_type in self.bin_counts:
+                self._show_bin_count(waste_type)
             
             # Update coin display (simulate based on recyclable items processed)
             # recyclable_classes = {
             #     'plastic', 'glass', 'carton'
             # }
-            recyclable_count = sum(self.bin_counts[cls] for cls in recyclable_classes if cls in self.bin_counts)
+            recyclable_count = sum(self.bin_counts[cls] for cls in RECYCLABLE_CLASSES if cls in self.bin_counts)
             coins_used = min(recyclable_count, self.coin_capacity)  # 1 coin per recyclable item
             self.coin_count = max(0, self.coin_capacity - coins_used)
             
             if hasattr(self, 'coin_progress'):
-                self.coin_progress.set(self.coin_count / self.coin_capacity)
-                self.coin_count_label.configure(text=f"{self.coin_count}/{self.coin_capacity} coins")
+                self._show_coin_count()
                 
         except Exception as e:
             # Silently fail for missing visual elements during initialization
             pass
     
     def _add_message(self, message: str, tag: str = ""):
-        """Add a message to the log"""
+        """Add a message to the log (GUI thread only; written on the next flush)"""
+        self._log_buffer.append((message, tag))
+        if not self._log_flush_pending:
+            self._log_flush_pending = True
+            self.root.after_idle(self._flush_messages)
+    
+    def _flush_messages(self):
+        """Write all buffered log messages with a single insert"""
+        self._log_flush_pending = False
+        if not self._log_buffer:
+            return
+        
+        # Text.insert takes alternating text/tag arguments; consecutive lines
+        # with the same tag are joined so each run becomes one tagged segment
+        args = []
+        for tag, run in itertools.groupby(self._log_buffer, key=lambda entry: entry[1]):
+            args.append("".join([message + "\n" for message, _ in run]))
+            args.append(tag)
+        self._log_buffer.clear()
+        
         self.message_log.config(state=tk.NORMAL)
-        self.message_log.insert(tk.END, message + "\n", tag)
+        self.message_log.insert(tk.END, *args)
+        
+        # Trim from the top in a single delete; "end-1c" sits on the trailing empty line
+        line_count = int(self.message_log.index("end-1c").split(".")[0]) - 1
+        if line_count > MAX_LOG_LINES:
+            self.message_log.delete("1.0", f"{line_count - MAX_LOG_LINES + 1}.0")
         self.message_log.config(state=tk.DISABLED)
         
         # Auto-scroll if enabled
         if self.auto_scroll_var.get():
             self.message_log.see(tk.END)
     
-    def _update_image_display(self, image: Image.Image, metadata: Dict, timestamp: str):
-        """Update the image display"""
+    def _update_image_display(self, image: Image.Image, preview: Image.Image, metadata: Dict, timestamp: str):
+        """Update the image display with a preview already sized by the protocol thread
+        
+        The preview itself is painted once per queue drain, so a burst only shows its last image.
+        """
         try:
-            # Store original image
-            self.current_image = image.copy()
-            
-            # Resize for display (maintain aspect ratio)
-            display_size = (400, 300)
-            image_display = image.copy()
-            image_display.thumbnail(display_size, Image.Resampling.LANCZOS)
-            
-            # Convert to PhotoImage
-            photo = ImageTk.PhotoImage(image_display)
-            
-            # Update label
-            self.image_label.configure(image=photo, text="")
-            self.image_label.image = photo  # Keep a reference
+            # Store original image (never modified after decoding, so no copy needed)
+            self.current_image = image
             
-            # Update image info
-            info_text = f"Size: {image.size[0]}x{image.size[1]} | Format: {image.format or 'Unknown'} | Time: {timestamp}"
-            self.image_info.configure(text=info_text)
+            # Update image info with the size as received, not the reduced decode size
+            width, height = metadata.get('original_size', image.size)
+            info_text = f"Size: {width}x{height} | Format: {image.format or 'Unknown'} | Time: {timestamp}"
+            self._pending_preview = (preview, info_text)
             
-            self._add_message(f"[{timestamp}] 🖼️ IMAGE: Received {image.size[0]}x{image.size[1]} image", "info")
+            self._add_message(f"[{timestamp}] 🖼️ IMAGE: Received {width}x{height} image", "info")
             
         except Exception as e:
             self._add_message(f"[{timestamp}] ❌ ERROR: Failed to display image: {e}", "error")
@@ -1074,8 +1348,8 @@ class SmartBinGUI:
             print(f"📊 Top Prediction: {result} ({confidence*100:.2f}%)")
             print(f"📋 All Class Confidences:")
             
-            # Sort classes by confidence for console display
-            sorted_classes = sorted(all_classes.items(), key=lambda x: x[1], reverse=True)
+            # The backend already orders classes by descending confidence
+            sorted_classes = list(all_classes.items())
             
             # Print all classes with confidences
             for i, (class_name, conf) in enumerate(sorted_classes):
@@ -1083,7 +1357,7 @@ class SmartBinGUI:
                 print(f"  {rank_emoji} {class_name:<20} : {conf*100:6.2f}%")
             
             # Check if class is recognized by our hard-coded system
-            known_classes = set(self.bin_counts.keys())
+            known_classes = self.known_classes
             model_classes = set(all_classes.keys());
 
             print(f"\n🔧 System Analysis:")
@@ -1100,72 +1374,57 @@ class SmartBinGUI:
             # recyclable_classes = {
             #     'plastic', 'glass', 'carton', "aluminium"
             # }
-            binary_result = "RECYCLABLE" if result.lower() in recyclable_classes else "NON-RECYCLABLE"
+            binary_result = "RECYCLABLE" if result.lower() in RECYCLABLE_CLASSES else "NON-RECYCLABLE"
             print(f"  🔄 Binary Mapping: {result} → {binary_result}")
             print(f"{'='*60}\n")
             
             # Update session stats with the classified item
             self._update_session_stats(result)
             
-            # Clear existing widgets (but preserve the frame structure)
-            for widget in self.classification_results.winfo_children():
-                widget.destroy()
-            
-            # Ensure we have valid classification data
-            if not all_classes or not result:
-                # Restore default "no classification" message
-                self.no_classification_label = ctk.CTkLabel(
-                    self.classification_results,
-                    text="No classification data\nyet available",
-                    font=ctk.CTkFont(size=14),
-                    text_color=("gray50", "gray60")
-                )
-                self.no_classification_label.pack(expand=True)
-                return
-            
-            # Sort classes by confidence
-            sorted_classes = sorted(all_classes.items(), key=lambda x: x[1], reverse=True)
-            
-            # Create display for each class
-            for i, (class_name, conf) in enumerate(sorted_classes):
-                # Class frame
-                class_frame = ctk.CTkFrame(self.classification_results)
-                class_frame.pack(fill="x", padx=5, pady=2)
-                
-                # Emoji for ranking
-                emoji = ["🥇", "🥈", "🥉", "📝"][i] if i < 4 else "📝"
-                
-                # Class name and confidence
-                class_label = ctk.CTkLabel(
-                    class_frame,
-                    text=f"{emoji} {class_name}: {conf*100:.1f}%",
-                    font=ctk.CTkFont(size=14, weight="bold" if i == 0 else "normal")
-                )
-                class_label.pack(side="left", padx=10, pady=5)
-                
-                # Progress bar for confidence
-                progress = ctk.CTkProgressBar(
-                    class_frame,
-                    width=150,
-                    height=10
-                )
-                progress.pack(side="right", padx=10, pady=5)
-                progress.set(conf)
-            
-            # Timestamp
-            time_label = ctk.CTkLabel(
-                self.classification_results,
-                text=f"⏰ {timestamp}",
-                font=ctk.CTkFont(size=12),
-                text_color=("gray60", "gray40")
-            )
-            time_label.pack(pady=(10, 5))
+            # The classification section is optional in the layout; rows are painted once per drain
+            if hasattr(self, 'class_rows'):
+                self._pending_class_rows = (sorted_classes if all_classes and result else [], timestamp)
             
             self._add_message(f"[{timestamp}] 🎯 CLASSIFICATION: {result} ({confidence*100:.1f}%)", "info")
             
         except Exception as e:
             self._add_message(f"[{timestamp}] ❌ ERROR: Failed to update classification: {e}", "error")
     
+    def _show_class_rows(self, sorted_classes: list, timestamp: str):
+        """Reconfigure the pooled result rows in place; an empty list restores the placeholder"""
+        # Unpack the timestamp first so rows re-shown below stay above it
+        self.class_time_label.pack_forget()
+        
+        if not sorted_classes:
+            for row in self.class_rows:
+                if row['shown']:
+                    row['frame'].pack_forget()
+                    row['shown'] = False
+            self.no_classification_label.pack(expand=True)
+            return
+        
+        self.no_classification_label.pack_forget()
+        for i, (class_name, conf) in enumerate(sorted_classes):
+            row = self._get_class_row(i)
+            emoji = RANK_EMOJI[i] if i < len(RANK_EMOJI) else "📝"
+            row['label'].configure(
+                text=f"{emoji} {class_name}: {conf*100:.1f}%",
+                font=self._font(14, "bold" if i == 0 else "normal")
+            )
+            row['progress'].set(conf)
+            if not row['shown']:
+                row['frame'].pack(fill="x", padx=5, pady=2)
+                row['shown'] = True
+        
+        # Hide rows left over from a result with more classes
+        for row in self.class_rows[len(sorted_classes):]:
+            if row['shown']:
+                row['frame'].pack_forget()
+                row['shown'] = False
+        
+        self.class_time_label.configure(text=f"⏰ {timestamp}")
+        self.class_time_label.pack(pady=(10, 5))
+    
     def _toggle_connection(self):
         """Toggle connection to ESP32"""
         if not self.running:
@@ -1181,6 +1440,7 @@ class SmartBinGUI:
         
         # If disabled while reconnecting, stop attempts
         if not self.auto_reconnect and not self.connected:
+            self._reconnect_stop.set()
             self.status_label.configure(text="🔴 Disconnected")
             self.connect_btn.configure(text="🔗 Connect", state="normal")
     
@@ -1209,6 +1469,7 @@ class SmartBinGUI:
             )
             
             # Start protocol in separate thread
+            self._add_message("[GUI] 🔗 Attempting to connect...", "info")
             self.protocol_thread = threading.Thread(target=self._run_protocol, daemon=True)
             self.running = True
             self.protocol_thread.start()
@@ -1226,6 +1487,7 @@ class SmartBinGUI:
             self.connected = False
             self.auto_reconnect = False  # Disable auto-reconnect on manual disconnect
             self.reconnect_attempts = 0  # Reset reconnection attempts
+            self._reconnect_stop.set()
             
             if self.protocol:
                 self.protocol.stop()
@@ -1275,96 +1537,123 @@ class SmartBinGUI:
             self.status_label.configure(text="🟡 Reconnecting...")
             self.connect_btn.configure(text="🔄 Auto-Reconnecting...", state="disabled")
             
-            # Start reconnection attempts
+            # Start reconnection attempts on a background thread; protocol.start() blocks
             self.reconnect_attempts = 0
-            self._attempt_reconnection()
+            if self._reconnect_thread is None or not self._reconnect_thread.is_alive():
+                self._reconnect_stop.clear()
+                self._reconnect_thread = threading.Thread(
+                    target=self._reconnect_loop,
+                    args=(self.mac_entry.get().strip(),),
+                    daemon=True
+                )
+                self._reconnect_thread.start()
         else:
             self.status_label.configure(text="🔴 Connection Lost")
             self.connect_btn.configure(text="🔗 Connect", state="normal")
             self._add_message("[GUI] ℹ️ Auto-reconnect disabled. Click Connect to reconnect manually.", "info")
     
-    def _attempt_reconnection(self):
-        """Attempt to reconnect to ESP32 with exponential backoff"""
-        if not self.running or self.connected or not self.auto_reconnect:
-            return
-            
-        self.reconnect_attempts += 1
-        
-        # Calculate delay with exponential backoff (1, 2, 4, 8, 16, 30, 30, ...)
-        delay = min(2 ** min(self.reconnect_attempts - 1, 4), self.max_reconnect_interval)
+    def _reconnect_loop(self, mac_address: str):
+        """Attempt to reconnect to ESP32 with exponential backoff (background thread)
         
-        try:
-            self._add_message(f"[GUI] 🔄 Reconnection attempt #{self.reconnect_attempts} (next in {delay}s)...", "info")
+        Widget updates go back to the Tk thread via _call_on_tk / _post_message.
+        """
+        while self.running and not self.connected and self.auto_reconnect:
+            self.reconnect_attempts += 1
             
-            # Clean up old protocol
-            if self.protocol:
-                try:
-                    self.protocol.stop()
-                except:
-                    pass
+            # Calculate delay with exponential backoff (1, 2, 4, 8, 16, 16, ...), capped by max_reconnect_interval
+            delay = min(2 ** min(self.reconnect_attempts - 1, 4), self.max_reconnect_interval)
             
-            # Create new protocol instance
-            mac_address = self.mac_entry.get().strip()
-            self.protocol = self.protocol_class(
-                self,
-                esp32_mac=mac_address,
-                rfcomm_device="/dev/rfcomm0",
-                baudrate=115200
-            )
+            self._post_message({
+                'type': 'info',
+                'message': f"🔄 Reconnection attempt #{self.reconnect_attempts}...",
+                'timestamp': _timestamp()
+            })
             
-            # Try to reconnect
-            success = self.protocol.start()
-            if success:
-                self.connected = True
-                attempts_made = self.reconnect_attempts
-                self.reconnect_attempts = 0  # Reset counter on success
-                self.status_label.configure(text="🟢 Reconnected")
-                self.connect_btn.configure(text="🔌 Disconnect", state="normal")
-                self._add_message(f"[GUI] ✅ Successfully reconnected after {attempts_made} attempts!", "info")
-                self._monitor_connection()  # Resume monitoring
-                return
-            else:
-                # Schedule next attempt with exponential backoff
-                self._add_message(f"[GUI] ⚠️ Reconnect failed, retrying in {delay} seconds...", "warning")
-                self.root.after(delay * 1000, self._attempt_reconnection)
+            try:
+                # Clean up old protocol
+                if self.protocol:
+                    try:
+                        self.protocol.stop()
+                    except:
+                        pass
                 
-        except Exception as e:
-            self._add_message(f"[GUI] ❌ Reconnection attempt failed: {e}", "error")
-            # Schedule next attempt with exponential backoff
-            self.root.after(delay * 1000, self._attempt_reconnection)
+                # Create new protocol instance and try to reconnect
+                self.protocol = self.protocol_class(
+                    self,
+                    esp32_mac=mac_address,
+                    rfcomm_device="/dev/rfcomm0",
+                    baudrate=115200
+                )
+                if self.protocol.start():
+                    self._call_on_tk(self._on_reconnected)
+                    return
+                
+                self._post_message({
+                    'type': 'error',
+                    'message': f"⚠️ Reconnect failed, retrying in {delay} seconds...",
+                    'timestamp': _timestamp()
+                })
+            except Exception as e:
+                self._post_message({
+                    'type': 'error',
+                    'message': f"❌ Reconnection attempt failed: {e}",
+                    'timestamp': _timestamp()
+                })
+            
+            # Sleep until the next attempt, waking early on disconnect / auto-reconnect off
+            if self._reconnect_stop.wait(delay):
+                return
+    
+    def _on_reconnected(self):
+        """Apply a successful reconnection (Tk thread)"""
+        self.connected = True
+        attempts_made = self.reconnect_attempts
+        self.reconnect_attempts = 0  # Reset counter on success
+        self.status_label.configure(text="🟢 Reconnected")
+        self.connect_btn.configure(text="🔌 Disconnect", state="normal")
+        self._add_message(f"[GUI] ✅ Successfully reconnected after {attempts_made} attempts!", "info")
+        self._monitor_connection()  # Resume monitoring
     
     def _run_protocol(self):
-        """Run the protocol in a separate thread"""
+        """Run the protocol in a separate thread
+        
+        Only the blocking start happens here; the outcome is handed to the Tk
+        thread with _call_on_tk, so no widget or GUI state is touched from this thread.
+        """
         try:
-            self._add_message("[GUI] 🔗 Attempting to connect...", "info")
             success = self.protocol.start()
-            if success:
-                self.connected = True
-                self.last_connection_time = datetime.now()
-                self.system_stats['successful_connections'] += 1
-                self.root.after(0, lambda: self.status_label.configure(text="🟢 Connected"))
-                self.root.after(0, lambda: self.connect_btn.configure(text="🔌 Disconnect", state="normal"))
-                self._add_message("[GUI] ✅ Successfully connected to ESP32", "info")
-                
-                # Start connection monitoring
-                self._monitor_connection()
-            else:
-                self.connected = False
-                self.system_stats['connection_failures'] += 1
-                self.root.after(0, lambda: self.status_label.configure(text="🔴 Connection Failed"))
-                self.root.after(0, lambda: self.connect_btn.configure(text="🔗 Connect", state="normal"))
-                self.running = False
-                self._add_message("[GUI] ❌ Failed to connect to ESP32", "error")
         except Exception as e:
+            self._call_on_tk(self._on_protocol_error, e)
+        else:
+            self._call_on_tk(self._on_protocol_started, success)
+    
+    def _on_protocol_started(self, success: bool):
+        """Apply the result of a protocol start (Tk thread)"""
+        if success:
+            self.connected = True
+            self.last_connection_time = datetime.now()
+            self.system_stats['successful_connections'] += 1
+            self.status_label.configure(text="🟢 Connected")
+            self.connect_btn.configure(text="🔌 Disconnect", state="normal")
+            self._add_message("[GUI] ✅ Successfully connected to ESP32", "info")
+            
+            # Start connection monitoring
+            self._monitor_connection()
+        else:
             self.connected = False
-            self.message_queue.put({
-                'type': 'error',
-                'message': f"Protocol error: {e}",
-                'timestamp': datetime.now().strftime("%H:%M:%S")
-            })
+            self.system_stats['connection_failures'] += 1
+            self.status_label.configure(text="🔴 Connection Failed")
+            self.connect_btn.configure(text="🔗 Connect", state="normal")
             self.running = False
-            self.root.after(0, lambda: self.status_label.configure(text="🔴 Connection Error"))
-            self.root.after(0, lambda: self.connect_btn.configure(text="🔗 Connect", state="normal"))
+            self._add_message("[GUI] ❌ Failed to connect to ESP32", "error")
+    
+    def _on_protocol_error(self, error: Exception):
+        """Report an exception raised while starting the protocol (Tk thread)"""
+        self.connected = False
+        self.running = False
+        self._add_message(f"[{_timestamp()}] ❌ ERROR: Protocol error: {error}", "error")
+        self.status_label.configure(text="🔴 Connection Error")
+        self.connect_btn.configure(text="🔗 Connect", state="normal")
     
     def _send_manual_command(self):
         """Send a manual command"""
@@ -1394,6 +1683,7 @@ class SmartBinGUI:
     
     def _clear_message_log(self):
         """Clear the message log"""
+        self._log_buffer.clear()
         self.message_log.config(state=tk.NORMAL)
         self.message_log.delete(1.0, tk.END)
         self.message_log.config(state=tk.DISABLED)
@@ -1404,8 +1694,8 @@ class SmartBinGUI:
         try:
             stats_file = "smartbin_stats.json"
             if os.path.exists(stats_file):
-                with open(stats_file, 'r') as f:
-                    data = json.load(f)
+                with open(stats_file, 'rb') as f:
+                    data = orjson.loads(f.read()) if orjson is not None else json.load(f)
                     self.bin_stats = data.get('bin_stats', self.bin_stats)
                     self.system_stats = data.get('system_stats', self.system_stats)
                     self.total_items_processed = data.get('total_items_processed', 0)
@@ -1425,14 +1715,13 @@ class SmartBinGUI:
             print(f"⚠️ Could not load stats: {e}")
     
     def _save_persistent_stats(self):
-        """Save persistent statistics to file"""
+        """Hand the statistics to the writer thread if they changed since the last save"""
         try:
             # Prepare data for JSON serialization
             data = {
                 'bin_stats': {},
                 'system_stats': self.system_stats.copy(),
                 'total_items_processed': self.total_items_processed,
-                'last_saved': datetime.now().isoformat()
             }
             
             # Convert datetime objects to strings
@@ -1444,13 +1733,35 @@ class SmartBinGUI:
             if data['system_stats']['last_maintenance']:
                 data['system_stats']['last_maintenance'] = data['system_stats']['last_maintenance'].isoformat()
             
-            stats_file = "smartbin_stats.json"
-            with open(stats_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            if data != self._saved_stats:
+                self._saved_stats = data
+                self._stats_to_write = data
+                self._stats_dirty.set()
                 
         except Exception as e:
             print(f"⚠️ Could not save stats: {e}")
     
+    def _stats_writer(self):
+        """Write queued statistics snapshots to disk, off the Tk thread"""
+        stats_file = "smartbin_stats.json"
+        while True:
+            self._stats_dirty.wait()
+            self._stats_dirty.clear()
+            data = dict(self._stats_to_write, last_saved=datetime.now().isoformat())
+            try:
+                if orjson is not None:
+                    payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+                else:
+                    payload = json.dumps(data, indent=2).encode()
+                
+                # Write to a temp file and rename, so a crash never leaves a truncated stats file
+                tmp_file = stats_file + ".tmp"
+                with open(tmp_file, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp_file, stats_file)
+            except Exception as e:
+                print(f"⚠️ Could not save stats: {e}")
+    
     def _start_stats_updates(self):
         """Start the stats update loop"""
         self._update_stats_display()
@@ -1494,7 +1805,7 @@ class SmartBinGUI:
             # }
             
             # Use binary mapping for legacy bin stats (0=recyclable, 1=non-recyclable)
-            if waste_type.lower() in recyclable_classes:
+            if waste_type.lower() in RECYCLABLE_CLASSES:
                 bin_id = 0  # Recyclable bin
             else:
                 bin_id = 1  # Non-recyclable bin
@@ -1508,7 +1819,7 @@ class SmartBinGUI:
             self.system_stats['total_classifications'] += 1
             
             # Simulate coin dispensing for recyclable items only
-            if waste_type.lower() in recyclable_classes:
+            if waste_type.lower() in RECYCLABLE_CLASSES:
                 self.system_stats['coins_dispensed'] += 1
                 self._add_message(f"[SYSTEM] 🪙 Coin dispensed for {waste_type}! Total: {self.system_stats['coins_dispensed']}", "info")
             
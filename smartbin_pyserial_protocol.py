@@ -8,13 +8,29 @@ import serial
 import subprocess
 import threading
 import time
-import base64
 import io
+import queue
 import random
+import select
 from PIL import Image
 from typing import Optional, Tuple
 
+try:
+    from pybase64 import b64decode  # Optional SIMD base64 decoder with the same API
+except ImportError:
+    from base64 import b64decode
+
+import rfcomm
+
+# Valid protocol codes: exact 5-char codes plus the PA###/PX###/ERR## families
+PROTOCOL_CODES = frozenset(('RTC00', 'RTC01', 'RTC02', 'CLS01'))
+PROTOCOL_PREFIXES = ('PA', 'PX', 'ERR')
+
 class SmartBinPySerialProtocol:
+    # Completed images are classified in micro-batches of whatever is already
+    # queued (at most INFER_MAX_BATCH); the worker never waits for more to arrive
+    INFER_MAX_BATCH = 4
+
     def __init__(self, esp32_mac: str = "EC:E3:34:15:F2:62", rfcomm_device: str = "/dev/rfcomm0", baudrate: int = 115200):
         self.esp32_mac = esp32_mac
         self.rfcomm_device = rfcomm_device
@@ -27,11 +43,33 @@ class SmartBinPySerialProtocol:
         # Protocol state
         self.waiting_for_image = False
         self.image_metadata = {}
-        self.image_parts = {}
+        self.image_parts = {}  # Parts received ahead of the next one to decode
         self.expected_parts = 0
+        self._image_buf = bytearray()  # Decoded image bytes so far
+        self._b64_tail = b""  # Base64 characters left over from an incomplete 4-char group
+        self._next_part = 1
+        
+        # Protocol dispatch: exact codes first, then 2-char code families
+        self._code_handlers = {
+            'RTC00': self._on_connection_request,
+            'RTC02': self._on_connection_established,
+            'PA000': self._on_image_metadata,
+        }
+        self._family_handlers = {
+            'PA': self._on_image_part,
+            'PX': self._on_final_image_part,
+            'ER': self._on_error,  # Only ERR## passes _parse_protocol_line
+        }
+        
+        # Bytes read from the port that don't yet form a complete line
+        self._rx_buf = bytearray()
         
         # Threading
         self.reader_thread = None
+        self.infer_thread = None
+        self._infer_queue = queue.Queue(maxsize=8)
+        # The reader (RTC01, ERR*) and inference (CLS01) threads both send
+        self._write_lock = threading.Lock()
         
     def start(self):
         """Start the communication system"""
@@ -45,6 +83,7 @@ class SmartBinPySerialProtocol:
             
         self.running = True
         self._start_reader_thread()
+        self._start_infer_thread()
         
         # Start main communication loop
         self._main_loop()
@@ -59,15 +98,29 @@ class SmartBinPySerialProtocol:
         
         if self.reader_thread:
             self.reader_thread.join(timeout=2)
+        if self.infer_thread:
+            self.infer_thread.join(timeout=2)
             
         self._cleanup_serial()
         self._cleanup_rfcomm_binding()
     
+    def _bind_rfcomm_direct(self) -> bool:
+        """Rebind /dev/rfcomm0 to the ESP32 via ioctl; False means the sudo path is needed"""
+        if not rfcomm.bind(self.esp32_mac):
+            return False
+        self.rfcomm_bound = True
+        return True
+    
     def _setup_rfcomm_binding(self) -> bool:
         """Setup RFCOMM binding automatically"""
         try:
             print(f"🔗 Automatically binding RFCOMM device to ESP32 {self.esp32_mac}...")
             
+            # Fast path: bind via ioctl when the process has CAP_NET_ADMIN
+            if self._bind_rfcomm_direct():
+                print(f"✅ RFCOMM device bound to {self.rfcomm_device}")
+                return True
+            
             # First, try to release any existing binding (in case it's already bound)
             try:
                 release_cmd = ["sudo", "rfcomm", "release", "0"]
@@ -100,6 +153,10 @@ class SmartBinPySerialProtocol:
     def _cleanup_rfcomm_binding(self):
         """Cleanup RFCOMM binding"""
         if self.rfcomm_bound:
+            if rfcomm.release():
+                print("✅ RFCOMM device released")
+                self.rfcomm_bound = False
+                return
             try:
                 print("🔓 Releasing RFCOMM device...")
                 release_cmd = ["sudo", "rfcomm", "release", "0"]
@@ -154,20 +211,82 @@ class SmartBinPySerialProtocol:
         self.reader_thread.start()
         print("📖 Reader thread started")
     
+    def _start_infer_thread(self):
+        """Start the classification worker thread"""
+        self.infer_thread = threading.Thread(target=self._infer_worker, daemon=True)
+        self.infer_thread.start()
+    
+    def _infer_worker(self):
+        """Classify completed images as they arrive, batching any that queued up meanwhile"""
+        while self.running:
+            try:
+                items = [self._infer_queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            
+            # The ESP32 waits for CLS01 after each image, so usually nothing else
+            # is queued; dispatch right away rather than waiting for a batch to fill
+            while len(items) < self.INFER_MAX_BATCH:
+                try:
+                    items.append(self._infer_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                self._classify_batch(items)
+            except Exception as e:
+                print(f"❌ Classification error: {e}")
+    
+    def _queue_for_inference(self, image, metadata: dict):
+        """Queue an image for the classification worker without ever blocking the reader
+        
+        If classification has fallen a full queue behind, the oldest waiting image is
+        dropped so results stay current, and the ESP32 gets ERR04 in place of its CLS01.
+        """
+        while True:
+            try:
+                self._infer_queue.put_nowait((image, metadata))
+                return
+            except queue.Full:
+                try:
+                    self._infer_queue.get_nowait()
+                except queue.Empty:
+                    continue
+                print("⚠️ Classification backlog full, dropped oldest image")
+                self._send_error("ERR04", "classification_dropped")
+    
+    def _classify_batch(self, items: list):
+        """Classify a batch of (image, metadata) pairs; the GUI protocol provides the classifier"""
+        pass
+    
     def _reader_loop(self):
         """Read messages from ESP32 using PySerial"""
         print("📖 PySerial reader thread active")
         
+        rx = self._rx_buf
+        rx.clear()
+        fd = getattr(self.ser, 'fd', None)
+        
         while self.running and self.ser and self.ser.is_open:
             try:
                 # Check if data is available
-                if self.ser.in_waiting > 0:
-                    # Read a complete line
-                    line = self.ser.readline().decode('utf-8', errors='ignore').strip()
-                    
-                    if line:
-                        # print(f"📥 Raw line: '{line}'")
-                        self._process_line(line)
+                n = self.ser.in_waiting
+                if n > 0:
+                    # Take everything queued in one read, then decode all complete lines
+                    # in one go (a newline never falls inside a UTF-8 sequence)
+                    rx += self.ser.read(n)
+                    end = rx.rfind(b'\n')
+                    if end >= 0:
+                        text = rx[:end].decode('utf-8', errors='ignore')
+                        del rx[:end + 1]
+                        for line in text.split('\n'):
+                            line = line.strip()
+                            if line:
+                                # print(f"📥 Raw line: '{line}'")
+                                self._process_line(line)
+                elif fd is not None:
+                    # Block in the kernel until the port is readable (timeout keeps self.running responsive)
+                    select.select([fd], [], [], 0.1)
                 else:
                     # Small sleep to prevent busy waiting
                     time.sleep(0.01)
@@ -182,12 +301,15 @@ class SmartBinPySerialProtocol:
     def _process_line(self, line: str):
         """Process a received line"""
         # Check if it's a protocol message
-        if self._is_protocol_message(line):
-            code, content = self._extract_code_content(line)
-            self._handle_protocol_message(code, content)
+        parsed = self._parse_protocol_line(line)
+        if parsed is not None:
+            self._handle_protocol_message(*parsed)
         else:
-            # Non-protocol message (verbose/debug)
-            print(f"📝 ESP32: {line}")
+            self._handle_text_line(line)
+    
+    def _handle_text_line(self, line: str):
+        """Handle a non-protocol line (verbose/debug output from the ESP32)"""
+        print(f"📝 ESP32: {line}")
     
     def _send_message(self, code: str, content: str = "") -> bool:
         """Send a protocol message to ESP32"""
@@ -198,9 +320,10 @@ class SmartBinPySerialProtocol:
             
             message = f"{code} {content}".strip()
             
-            # Send message with newline
-            self.ser.write((message + '\n').encode('utf-8'))
-            self.ser.flush()  # Ensure data is sent immediately
+            # Send message with newline; one writer at a time so lines never interleave
+            with self._write_lock:
+                self.ser.write((message + '\n').encode('utf-8'))
+                self.ser.flush()  # Ensure data is sent immediately
             
             print(f"📤 Sent: {message}")
             return True
@@ -209,68 +332,59 @@ class SmartBinPySerialProtocol:
             print(f"❌ Send error: {e}")
             return False
     
-    def _is_protocol_message(self, line: str) -> bool:
-        """Check if line is a protocol message"""
-        if len(line) < 6:
-            return False
-        
-        code = line[:5]
-        if line[5] != ' ':
-            return False
+    def _parse_protocol_line(self, line: str) -> Optional[Tuple[str, str]]:
+        """Split a protocol message into (code, content); None if the line is not one"""
+        if len(line) < 6 or line[5] != ' ':
+            return None
         
         # Check valid protocol codes
-        return (code in ['RTC00', 'RTC01', 'RTC02', 'CLS01'] or
-                code.startswith('PA') or code.startswith('PX') or 
-                code.startswith('ERR'))
-    
-    def _extract_code_content(self, line: str) -> Tuple[str, str]:
-        """Extract code and content from protocol message"""
-        if len(line) >= 6:
-            code = line[:5]
-            content = line[6:] if len(line) > 6 else ""
-            return code, content
-        return "", ""
+        code = line[:5]
+        if code in PROTOCOL_CODES or code.startswith(PROTOCOL_PREFIXES):
+            return code, line[6:]
+        return None
     
     def _handle_protocol_message(self, code: str, content: str):
         """Handle incoming protocol messages"""
         print(f"📥 Protocol: {code} {content}")
         
-        if code == "RTC00":
-            # ESP32 ready to connect
-            print("🤝 ESP32 requesting connection")
-            if self._send_message("RTC01", "Laptop ready"):
-                print("✅ Sent connection response")
-            
-        elif code == "RTC02":
-            # Connection confirmed
-            print("🎉 Connection established with ESP32!")
-            self.connected = True
-            
-        elif code == "PA000":
-            # Image metadata
-            self._handle_image_metadata(content)
-            
-        elif code.startswith("PA"):
-            # Image part
-            part_num = int(code[2:])
-            self._handle_image_part(part_num, content)
-            
-        elif code.startswith("PX"):
-            # Final image part
-            part_num = int(code[2:])
-            self._handle_final_image_part(part_num, content)
-            
-        elif code.startswith("ERR"):
-            # Error message
-            print(f"⚠️ ESP32 Error: {content}")
+        handler = self._code_handlers.get(code) or self._family_handlers.get(code[:2])
+        if handler:
+            handler(code, content)
+    
+    def _on_connection_request(self, code: str, content: str):
+        """RTC00: ESP32 ready to connect"""
+        print("🤝 ESP32 requesting connection")
+        if self._send_message("RTC01", "Laptop ready"):
+            print("✅ Sent connection response")
+    
+    def _on_connection_established(self, code: str, content: str):
+        """RTC02: connection confirmed"""
+        print("🎉 Connection established with ESP32!")
+        self.connected = True
+    
+    def _on_image_metadata(self, code: str, content: str):
+        """PA000: image metadata"""
+        self._handle_image_metadata(content)
+    
+    def _on_image_part(self, code: str, content: str):
+        """PA###: image part"""
+        self._handle_image_part(int(code[2:]), content)
+    
+    def _on_final_image_part(self, code: str, content: str):
+        """PX###: final image part"""
+        self._handle_final_image_part(int(code[2:]), content)
+    
+    def _on_error(self, code: str, content: str):
+        """ERR##: error message"""
+        print(f"⚠️ ESP32 Error: {content}")
     
     def _handle_image_metadata(self, content: str):
         """Handle PA000 image metadata"""
         print(f"📷 Image metadata: {content}")
         
+        self._reset_image_state()
+        
         # Parse metadata: "type:image, size:12345, format:JPEG, width:640, height:480, id:img_123, parts:5"
-        self.image_metadata = {}
-        self.image_parts = {}
         
         for item in content.split(','):
             item = item.strip()
@@ -289,8 +403,9 @@ class SmartBinPySerialProtocol:
             print("⚠️ Received image part but not expecting image")
             return
         
-        self.image_parts[part_num] = content
+        self.image_parts[part_num] = content.encode('ascii')
         print(f"📦 Received image part {part_num}/{self.expected_parts}")
+        self._decode_ready_parts()
     
     def _handle_final_image_part(self, part_num: int, content: str):
         """Handle PX### final image part"""
@@ -299,39 +414,58 @@ class SmartBinPySerialProtocol:
             return
         
         # Add final part
-        self.image_parts[part_num] = content
+        self.image_parts[part_num] = content.encode('ascii')
         print(f"🏁 Received final image part {part_num}/{self.expected_parts}")
         
         # Process complete image
-        self._process_complete_image()
+        if self._decode_ready_parts():
+            self._process_complete_image()
+    
+    def _decode_ready_parts(self) -> bool:
+        """Decode every part that is next in sequence, so decoding keeps pace with arrival
+        
+        Returns False (after reporting ERR03 and dropping the image) if the data is not valid Base64
+        """
+        parts = self.image_parts
+        try:
+            while self._next_part in parts:
+                data = self._b64_tail + parts.pop(self._next_part)
+                cut = len(data) - len(data) % 4
+                self._image_buf += b64decode(memoryview(data)[:cut])
+                self._b64_tail = data[cut:]
+                self._next_part += 1
+        except Exception as e:
+            print(f"❌ Base64 decode error: {e}")
+            self._send_error("ERR03", "base64_decode_failed")
+            self.waiting_for_image = False
+            self._reset_image_state()
+            return False
+        return True
     
     def _process_complete_image(self):
         """Process the complete received image"""
         try:
             print("🔄 Processing complete image...")
             
-            # Reconstruct Base64 string from parts
-            base64_data = ""
-            for i in range(1, self.expected_parts + 1):
-                if i in self.image_parts:
-                    base64_data += self.image_parts[i]
-                else:
-                    print(f"❌ Missing image part {i}")
-                    self._send_error("ERR02", "missing_image_parts")
-                    return
+            # Parts were decoded as they arrived; only the last partial group is left
+            image_data, missing = self._finish_image_data()
+            if image_data is None:
+                print(f"❌ Missing image part {missing}")
+                self._send_error("ERR02", "missing_image_parts")
+                return
             
-            print(f"📏 Reconstructed Base64 length: {len(base64_data)}")
+            print(f"📏 Decoded image length: {len(image_data)}")
             
-            # Decode Base64 to image
+            # Open the decoded image
             try:
-                image_data = base64.b64decode(base64_data)
                 image = Image.open(io.BytesIO(image_data))
                 
                 print(f"🖼️ Image decoded successfully: {image.size}, {image.format}")
                 
                 # Note: Classification is now handled by GUI protocol integration
-                # The base protocol no longer performs classification directly
-                print("📸 Image processed successfully - classification handled by GUI")
+                # The base protocol only queues the image for the classification worker
+                self._queue_for_inference(image, self.image_metadata.copy())
+                print("📸 Image processed successfully - queued for classification")
                 
             except Exception as e:
                 print(f"❌ Base64 decode error: {e}")
@@ -344,9 +478,30 @@ class SmartBinPySerialProtocol:
         finally:
             # Reset image state
             self.waiting_for_image = False
-            self.image_metadata = {}
-            self.image_parts = {}
-            self.expected_parts = 0
+            self._reset_image_state()
+    
+    def _finish_image_data(self) -> Tuple[Optional[bytearray], int]:
+        """Decode the trailing Base64 characters and return the complete image bytes
+        
+        Returns (image bytes, 0), or (None, first missing part number)
+        """
+        if self._next_part <= self.expected_parts:
+            return None, self._next_part
+        
+        tail = self._b64_tail
+        if tail:
+            self._image_buf += b64decode(tail + b"=" * (-len(tail) % 4))
+            self._b64_tail = b""
+        return self._image_buf, 0
+    
+    def _reset_image_state(self):
+        """Forget any partially received image"""
+        self.image_metadata = {}
+        self.image_parts = {}
+        self.expected_parts = 0
+        self._image_buf = bytearray()
+        self._b64_tail = b""
+        self._next_part = 1
     
     def _send_error(self, error_code: str, message: str):
         """Send error message to ESP32"""